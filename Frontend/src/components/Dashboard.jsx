@@ -19,8 +19,29 @@ ChartJS.register(LineElement, PointElement, LinearScale, TimeScale, Title, Toolt
 
 Modal.setAppElement('#root');
 
+// Last chat seq seen per community and channel; sent on (re)connect so the
+// server only sends messages we don't have yet
+const lastMessageSeqs = {};
+
+// Merge server chat messages (which carry a seq) into a channel's history. A
+// batch that doesn't continue from the last seq we hold replaces the history.
+function mergeMessages(existing = [], incoming = []) {
+  if (!incoming.length) return existing;
+  const lastSeq = existing.reduce((max, m) => (m.seq > max ? m.seq : max), 0);
+  if (incoming[0].seq > lastSeq + 1) return incoming;
+  const ids = new Set(incoming.map(m => m.id));
+  return [...existing.filter(m => !ids.has(m.id) && !(m.seq >= incoming[0].seq)), ...incoming];
+}
+
+function rememberSeqs(communityId, channel, messages) {
+  if (messages.length) {
+    lastMessageSeqs[communityId] = { ...lastMessageSeqs[communityId], [channel]: messages[messages.length - 1].seq };
+  }
+}
+
 const socket = io('http://localhost:5000', {
   transports: ['websocket'],
+  auth: (cb) => cb({ messageSeqs: lastMessageSeqs }),
   cors: { origin: 'http://localhost:3000' },
   withCredentials: true, // Ensure credentials are included for CORS
   reconnection: true,
@@ -59,6 +80,8 @@ function Dashboard({ token }) {
   const [topDoctors, setTopDoctors] = useState({});
   const [selectedCommunity, setSelectedCommunity] = useState(null);
   const [posts, setPosts] = useState([]);
+  // Feed of the selected community, paged with the X-Next-Cursor header
+  const [communityPosts, setCommunityPosts] = useState({ communityId: null, posts: [], nextCursor: null });
   const [newPostContent, setNewPostContent] = useState('');
   const [newPostImage, setNewPostImage] = useState(null);
   const [isCommunityOpen, setIsCommunityOpen] = useState(false);
@@ -124,6 +147,27 @@ function Dashboard({ token }) {
     debouncedFetch(url, callback);
   }, [debouncedFetch]);
 
+  const fetchCommunityPosts = useCallback(async (communityId, cursor) => {
+    try {
+      const response = await axios.get(`http://localhost:5000/api/community/${communityId}/posts`, {
+        params: cursor ? { cursor } : {},
+        headers: { Authorization: `Bearer ${token}` },
+        timeout: 10000,
+        withCredentials: true,
+      });
+      const page = Array.isArray(response.data) ? response.data : [];
+      setCommunityPosts(prev => {
+        // A later page is appended; anything else replaces the feed
+        const kept = cursor && prev.communityId === communityId ? prev.posts : [];
+        const seen = new Set(kept.map(p => p.id));
+        return { communityId, posts: [...kept, ...page.filter(p => !seen.has(p.id))], nextCursor: response.headers['x-next-cursor'] || null };
+      });
+    } catch (error) {
+      console.error('Error fetching community posts:', error);
+      setError(`Error fetching community posts: ${error.message}`);
+    }
+  }, [token]);
+
   const fetchCommunity = useCallback(async (type, location) => {
     setIsLoading(true);
     try {
@@ -143,9 +187,7 @@ function Dashboard({ token }) {
           },
         }));
       });
-      fetchData(`http://localhost:5000/api/community/${communityKey}/posts`, (postsData) => {
-        setPosts(postsData || []);
-      });
+      fetchCommunityPosts(communityKey);
     } catch (error) {
       console.error('Error fetching community:', error);
       setError(`Error fetching community: ${error.message}`);
@@ -162,11 +204,11 @@ function Dashboard({ token }) {
         ...prev,
         [`${type}${location ? `_${location}` : ''}`]: { general: [], emergencies: [] },
       }));
-      setPosts([]);
+      setCommunityPosts({ communityId: null, posts: [], nextCursor: null });
     } finally {
       setIsLoading(false);
     }
-  }, [token, selectedChannel, fetchData]);
+  }, [token, selectedChannel, fetchData, fetchCommunityPosts]);
 
   const fetchPosts = useCallback(() => {
     fetchData('http://localhost:5000/api/community/Global/posts', (globalPosts) => {
@@ -181,9 +223,12 @@ function Dashboard({ token }) {
   const fetchPatients = useCallback(() => {
     fetchData('http://localhost:5000/api/patients', (data) => {
       const initialData = {};
+      // Each item is a patient with its newest reading, if it has any
       data.forEach(v => {
         initialData[v.patientId] = initialData[v.patientId] || [];
-        initialData[v.patientId].push(v);
+        if (v.latestVitals) {
+          initialData[v.patientId].push({ ...v.latestVitals, patientId: v.patientId });
+        }
       });
       setPatientsData(initialData);
     });
@@ -226,6 +271,13 @@ function Dashboard({ token }) {
     const handleConnect = () => {
       console.log('New client connected to backend on port 5000');
       socket.emit('requestInitialData', { user: currentUser });
+      // The server only sends events for rooms a client has joined
+      socket.emit('subscribe', {
+        patients: '*',
+        communities: ['Global', 'Local_India'],
+        channels: ['Global', 'Local_India'].flatMap(communityId => ['general', 'emergencies'].map(channel => ({ communityId, channel }))),
+        user: currentUser,
+      });
       // Fetch initial data for all communities when a client connects
       fetchCommunity('Global', null);
       fetchCommunity('Local', 'India');
@@ -286,11 +338,20 @@ function Dashboard({ token }) {
     };
 
     const handleNewPost = (data) => {
-      if (mounted) setPosts(prev => [data.post, ...prev].slice(0, 10));
+      if (mounted) {
+        setPosts(prev => [data.post, ...prev].slice(0, 10));
+        setCommunityPosts(prev => prev.communityId && (data.post.sharedTo || []).includes(prev.communityId) && !prev.posts.some(p => p.id === data.post.id)
+          ? { ...prev, posts: [data.post, ...prev.posts] } : prev);
+      }
     };
 
     const handlePostUpdated = (data) => {
-      if (mounted) setPosts(prev => prev.map(p => p.id === data.postId ? { ...p, likes: data.likes, comments: data.comments } : p));
+      // The server sends the new like count and, for comments, only the new comment
+      const update = (p) => p.id === data.postId ? { ...p, likeCount: data.likes, comments: data.comment ? [...(p.comments || []), data.comment] : p.comments } : p;
+      if (mounted) {
+        setPosts(prev => prev.map(update));
+        setCommunityPosts(prev => ({ ...prev, posts: prev.posts.map(update) }));
+      }
     };
 
     const handleConnectionUpdate = (data) => {
@@ -311,11 +372,12 @@ function Dashboard({ token }) {
     const handleCommunityMessage = (data) => {
       if (mounted) {
         const communityKey = data.communityId;
+        rememberSeqs(communityKey, data.channel, [data.message]);
         setCommunityMessages(prev => ({
           ...prev,
           [communityKey]: {
             ...prev[communityKey],
-            [data.channel]: Array.isArray(prev[communityKey]?.[data.channel]) ? [...prev[communityKey][data.channel], data.message] : [data.message],
+            [data.channel]: mergeMessages(prev[communityKey]?.[data.channel], [data.message]),
           },
         }));
       }
@@ -332,9 +394,17 @@ function Dashboard({ token }) {
     const handleInitialData = (data) => {
       if (mounted) {
         setPosts(data.posts || []);
-        setCommunityMessages(data.messages || {
-          Global: { general: [], emergencies: [] },
-          Local_India: { general: [], emergencies: [] },
+        // Only messages newer than lastMessageSeqs are sent on reconnect
+        setCommunityMessages(prev => {
+          const merged = { ...prev };
+          Object.entries(data.messages || {}).forEach(([communityId, channels]) => {
+            merged[communityId] = { ...merged[communityId] };
+            Object.entries(channels).forEach(([channel, messages]) => {
+              rememberSeqs(communityId, channel, messages);
+              merged[communityId][channel] = mergeMessages(merged[communityId][channel], messages);
+            });
+          });
+          return merged;
         });
       }
     };
@@ -477,11 +547,13 @@ function Dashboard({ token }) {
     if (!likedPosts[postId]) {
       setIsLoading(true);
       try {
-        const post = posts.find(p => p.id === postId);
-        if (post && !post.likes[currentUser]) {
+        const post = posts.find(p => p.id === postId) || communityPosts.posts.find(p => p.id === postId);
+        if (post && !post.likes?.[currentUser]) {
           socket.emit('likePost', { postId, user: currentUser });
           setLikedPosts(prev => ({ ...prev, [postId]: true }));
-          setPosts(prev => prev.map(p => p.id === postId ? { ...p, likes: { ...p.likes, [currentUser]: true } } : p));
+          const like = (p) => p.id === postId ? { ...p, likes: { ...p.likes, [currentUser]: true } } : p;
+          setPosts(prev => prev.map(like));
+          setCommunityPosts(prev => ({ ...prev, posts: prev.posts.map(like) }));
         }
       } catch (error) {
         console.error('Error liking post:', error);
@@ -516,7 +588,7 @@ function Dashboard({ token }) {
   const handleSharePost = (postId, community) => {
     setIsLoading(true);
     try {
-      const post = posts.find(p => p.id === postId);
+      const post = posts.find(p => p.id === postId) || communityPosts.posts.find(p => p.id === postId);
       if (post) {
         const communityId = community === 'Global' ? 'Global' : 'Local_India';
         socket.emit('createPost', {
@@ -796,7 +868,7 @@ function Dashboard({ token }) {
                           className={`btn btn-sm ${likedPosts[post.id] ? 'btn-success' : 'btn-blue'} text-white hover:${likedPosts[post.id] ? 'bg-green-700' : 'bg-blue-700'}`}
                           disabled={likedPosts[post.id]}
                         >
-                          {likedPosts[post.id] ? 'Liked' : t('like')} ({Object.values(post.likes).filter(Boolean).length})
+                          {likedPosts[post.id] ? 'Liked' : t('like')} ({post.likeCount ?? Object.values(post.likes || {}).filter(Boolean).length})
                         </button>
                         <div className="flex space-x-2">
                           <input
@@ -913,7 +985,7 @@ function Dashboard({ token }) {
                   </div>
                   <h3 className="text-lg font-medium mt-4 mb-2 text-gray-200">{t('posts')}</h3>
                   <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
-                    {selectedCommunity?.posts?.map((post) => (
+                    {communityPosts.posts.map((post) => (
                       <div key={post.id} className="bg-gray-700 p-4 rounded-lg shadow-md border border-gray-600">
                         <p className="text-gray-200 font-medium"><strong>{post.author}</strong>: {post.content}</p>
                         {post.imageUrl && <img src={post.imageUrl} alt={post.content} className="mt-2 w-full rounded-lg h-48 object-cover" onError={(e) => { e.target.src = 'http://localhost:3000/images/default-post.jpg'; }} />}
@@ -923,7 +995,7 @@ function Dashboard({ token }) {
                             className={`btn btn-sm ${likedPosts[post.id] ? 'btn-success' : 'btn-blue'} text-white hover:${likedPosts[post.id] ? 'bg-green-700' : 'bg-blue-700'}`}
                             disabled={likedPosts[post.id]}
                           >
-                            {likedPosts[post.id] ? 'Liked' : t('like')} ({Object.values(post.likes).filter(Boolean).length})
+                            {likedPosts[post.id] ? 'Liked' : t('like')} ({post.likeCount ?? Object.values(post.likes || {}).filter(Boolean).length})
                           </button>
                           <div className="flex space-x-2">
                             <input
@@ -960,6 +1032,14 @@ function Dashboard({ token }) {
                       </div>
                     ))}
                   </div>
+                  {communityPosts.nextCursor && (
+                    <button
+                      onClick={() => fetchCommunityPosts(communityPosts.communityId, communityPosts.nextCursor)}
+                      className="btn btn-sm btn-gray w-full mt-4 text-gray-200"
+                    >
+                      Load more posts
+                    </button>
+                  )}
                 </div>
               </div>
             )}
@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+# Each trained model lives in its own versioned directory:
+#   <model_dir>/<version>/model.keras
+#   <model_dir>/<version>/weights/      (NumPy export, see inference.py)
+#   <model_dir>/<version>/metadata.json
+# Versions are UTC timestamps, so the newest artifact sorts last. metadata.json
+# is written last and the directory is renamed into place, so a half-written
+# artifact is never picked up by the loader.
+MODEL_FILE = 'model.keras'
+METADATA_FILE = 'metadata.json'
+
+FEATURE_ORDER = ['heartRate', 'spO2', 'respirationRate', 'temperature']
+DEFAULT_THRESHOLD = 0.7
+
+
+class ArtifactNotFoundError(Exception):
+    pass
+
+
+def new_version():
+    return datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+
+
+def list_versions(model_dir):
+    if not os.path.isdir(model_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(model_dir)
+        if os.path.isfile(os.path.join(model_dir, name, METADATA_FILE))
+    )
+
+
+def latest_version(model_dir):
+    versions = list_versions(model_dir)
+    if not versions:
+        raise ArtifactNotFoundError(f'No trained model found in {model_dir}; run `python train.py` first')
+    return versions[-1]
+
+
+def save_artifact(model, model_dir, metadata):
+    os.makedirs(model_dir, exist_ok=True)
+    version = new_version()
+    metadata = {
+        'version': version,
+        'createdAt': datetime.now(timezone.utc).isoformat(),
+        'inputShape': list(model.input_shape[1:]),
+        'threshold': DEFAULT_THRESHOLD,
+        'featureOrder': FEATURE_ORDER,
+        **metadata,
+    }
+    staging = tempfile.mkdtemp(prefix=f'.{version}-', dir=model_dir)
+    try:
+        model.save(os.path.join(staging, MODEL_FILE))
+        from inference import export_weights
+        export_weights(model, staging)
+        with open(os.path.join(staging, METADATA_FILE), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        os.rename(staging, os.path.join(model_dir, version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return version
+
+
+def load_metadata(model_dir, version=None):
+    version = version or latest_version(model_dir)
+    with open(os.path.join(model_dir, version, METADATA_FILE)) as f:
+        return json.load(f)
+
+
+def load_artifact(model_dir, version=None):
+    # TensorFlow is imported here rather than at module level so that tools
+    # which only need the metadata don't pay for it.
+    from tensorflow.keras.models import load_model
+
+    metadata = load_metadata(model_dir, version)
+    model = load_model(os.path.join(model_dir, metadata['version'], MODEL_FILE), compile=False)
+    return model, metadata
@@ -0,0 +1,106 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-sample predictions into one forward pass.
+
+    Callers block in submit() while a background thread drains the queue:
+    it waits for the first request, then keeps collecting until either
+    max_batch_size samples are queued or max_wait_ms has passed, stacks them
+    and calls predict_fn once for the whole batch. With threads > 1 several
+    batches can be in flight at once, e.g. when predict_fn hands them to a
+    process pool.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5, threads=1):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_batch_seen = 0
+        self._batch_sizes = {}
+        self._closed = False
+        self._threads = [threading.Thread(target=self._run, name=f'micro-batcher-{i}', daemon=True) for i in range(threads)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, sample, timeout=None):
+        return self.submit_async(sample).result(timeout)
+
+    def submit_async(self, sample):
+        if self._closed:
+            raise RuntimeError('MicroBatcher is closed')
+        future = Future()
+        self._queue.put((sample, future))
+        return future
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'queueDepth': self._queue.qsize(),
+                'batches': self._batches,
+                'items': self._items,
+                'avgBatchSize': self._items / self._batches if self._batches else 0.0,
+                'maxBatchSize': self._max_batch_seen,
+                'batchSizes': dict(sorted(self._batch_sizes.items())),
+                'config': {'maxBatchSize': self.max_batch_size, 'maxWaitMs': self.max_wait * 1000.0, 'threads': len(self._threads)},
+            }
+
+    def close(self):
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Re-queue the sentinel so this thread exits after the batch.
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            futures = [future for _, future in batch]
+            try:
+                scores = self.predict_fn(np.stack([sample for sample, _ in batch]))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, score in zip(futures, scores):
+                future.set_result(score)
+            self._record(len(batch))
+
+    def _record(self, size):
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            self._max_batch_seen = max(self._max_batch_seen, size)
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
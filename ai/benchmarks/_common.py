@@ -0,0 +1,40 @@
+import contextlib
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if AI_DIR not in sys.path:
+    sys.path.insert(0, AI_DIR)
+
+
+@contextlib.contextmanager
+def model_dir(path=None):
+    """Yield a directory holding a saved model, training a throwaway one if needed.
+
+    MODEL_DIR is exported before yielding so `import model` picks it up.
+    """
+    if path:
+        os.environ['MODEL_DIR'] = path
+        yield path
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run([sys.executable, 'train.py', '--model-dir', tmp, '--epochs', '1', '--samples', '64'],
+                       cwd=AI_DIR, check=True, capture_output=True,
+                       env={**os.environ, 'TF_CPP_MIN_LOG_LEVEL': '3'})
+        os.environ['MODEL_DIR'] = tmp
+        yield tmp
+
+
+def latency_summary(latencies_s, elapsed_s):
+    ms = np.asarray(latencies_s) * 1000.0
+    return {
+        'requests': int(ms.size),
+        'throughput_rps': ms.size / elapsed_s if elapsed_s else 0.0,
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+    }
@@ -0,0 +1,78 @@
+"""Load benchmark for /predict scoring with and without micro-batching.
+
+N client threads each issue back-to-back single-sample predictions; the
+unbatched run calls the model once per request, the batched run goes through
+MicroBatcher.
+
+    python benchmarks/bench_batching.py --clients 64 --requests 50
+"""
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+
+from _common import latency_summary, model_dir
+
+
+def run_load(score_fn, clients, requests_per_client):
+    latencies = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(clients + 1)
+    rng = np.random.default_rng(0)
+    sample = rng.random((20, 4)).astype(np.float32)
+
+    def client():
+        local = []
+        start_barrier.wait()
+        for _ in range(requests_per_client):
+            t0 = time.perf_counter()
+            score_fn(sample)
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    start_barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    return latency_summary(latencies, time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model-dir')
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=50, help='requests per client')
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    with model_dir(args.model_dir):
+        import model
+        from batcher import MicroBatcher
+
+        model.load_model()
+        model.predict_scores(np.zeros((1, 20, 4)))  # warm up
+
+        results = {'unbatched': run_load(lambda s: model.predict_scores(s[np.newaxis])[0], args.clients, args.requests)}
+        batcher = MicroBatcher(model.predict_scores, args.max_batch_size, args.max_wait_ms)
+        results['batched'] = run_load(batcher.submit, args.clients, args.requests)
+        results['batched']['avgBatchSize'] = batcher.stats()['avgBatchSize']
+        batcher.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, r in results.items():
+        print(f"{name:<10} {r['throughput_rps']:8.1f} req/s  p50 {r['p50_ms']:7.2f} ms  p99 {r['p99_ms']:7.2f} ms")
+    print(f"avg batch size: {results['batched']['avgBatchSize']:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Keras vs. NumPy inference backend: parity, import time, memory and latency.
+
+Each backend is measured in a fresh interpreter: the time to import the
+service and load the model, peak RSS, and latency for single samples and
+for batches. Parity is then checked on random inputs; the script exits
+non-zero if the backends disagree by more than --tolerance.
+
+    python benchmarks/bench_inference.py --batch-size 64
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from _common import AI_DIR, model_dir
+
+MEASURE_SNIPPET = '''
+import json, resource, sys, time
+t0 = time.perf_counter()
+import numpy as np
+import model
+m, _ = model.load_model()
+load_s = time.perf_counter() - t0
+rng = np.random.default_rng(0)
+single = rng.random((1, 20, 4)).astype(np.float32)
+batch = rng.random((BATCH, 20, 4)).astype(np.float32)
+m.predict_scores(single); m.predict_scores(batch)  # warm up
+def per_call(x, n):
+    t = time.perf_counter()
+    for _ in range(n):
+        m.predict_scores(x)
+    return (time.perf_counter() - t) / n * 1000.0
+print(json.dumps({
+    'import_and_load_s': load_s,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    'tensorflow_imported': 'tensorflow' in sys.modules,
+    'single_ms': per_call(single, 200),
+    'batch_ms': per_call(batch, 50),
+}))
+'''
+
+
+def measure(backend, batch_size):
+    env = {**os.environ, 'INFERENCE_BACKEND': backend, 'BATCHING': '0', 'TF_CPP_MIN_LOG_LEVEL': '3'}
+    out = subprocess.run([sys.executable, '-c', MEASURE_SNIPPET.replace('BATCH', str(batch_size))],
+                         cwd=AI_DIR, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def parity(path, samples):
+    import inference
+
+    rng = np.random.default_rng(1)
+    # Both raw-scale vitals and unit-range inputs, to cover saturated and linear regions
+    x = np.concatenate([
+        rng.random((samples, 20, 4)),
+        rng.random((samples, 20, 4)) * np.array([150, 100, 40, 38]),
+    ]).astype(np.float32)
+    keras_scores = inference.load_backend('keras', path).predict_scores(x)
+    numpy_scores = inference.load_backend('numpy', path).predict_scores(x)
+    return float(np.abs(keras_scores - numpy_scores).max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model-dir')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--parity-samples', type=int, default=256)
+    parser.add_argument('--tolerance', type=float, default=1e-4)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    with model_dir(args.model_dir) as path:
+        results = {backend: measure(backend, args.batch_size) for backend in ('keras', 'numpy')}
+        results['parity_max_abs_diff'] = parity(path, args.parity_samples)
+    results['parity_ok'] = results['parity_max_abs_diff'] <= args.tolerance
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for backend in ('keras', 'numpy'):
+            r = results[backend]
+            print(f"{backend:<6} load {r['import_and_load_s']:6.2f}s  peak RSS {r['peak_rss_mb']:7.1f} MB  "
+                  f"single {r['single_ms']:7.3f} ms  batch of {args.batch_size} {r['batch_ms']:7.3f} ms  "
+                  f"(tensorflow imported: {r['tensorflow_imported']})")
+        print(f"parity: max |keras - numpy| = {results['parity_max_abs_diff']:.2e} "
+              f"({'ok' if results['parity_ok'] else 'FAILED'}, tolerance {args.tolerance:g})")
+    sys.exit(0 if results['parity_ok'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Throughput of /predict_batch with JSON vs. binary (.npy) request bodies.
+
+Requests go through Flask's test client, so the numbers include body
+parsing, validation, the forward pass and response serialisation, but not
+the network.
+
+    python benchmarks/bench_payloads.py --items 1000 --requests 20
+"""
+import argparse
+import io
+import json
+import time
+
+import numpy as np
+
+from _common import model_dir
+
+
+def make_bodies(items):
+    rng = np.random.default_rng(0)
+    values = np.column_stack([
+        rng.integers(60, 150, items),
+        rng.integers(80, 100, items),
+        rng.integers(12, 40, items),
+        rng.uniform(36, 38, items).round(1),
+    ]).astype(np.float32)
+    rows = [dict(zip(['heartRate', 'spO2', 'respirationRate', 'temperature'], map(float, row))) for row in values]
+    columnar = {field: values[:, j].tolist() for j, field in enumerate(['heartRate', 'spO2', 'respirationRate', 'temperature'])}
+    buf = io.BytesIO()
+    np.save(buf, values)
+    return {
+        'json_rows': (json.dumps(rows).encode(), 'application/json'),
+        'json_columnar': (json.dumps(columnar).encode(), 'application/json'),
+        'npy': (buf.getvalue(), 'application/x-npy'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model-dir')
+    parser.add_argument('--items', type=int, default=1000, help='readings per request')
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    with model_dir(args.model_dir):
+        import model
+
+        client = model.app.test_client()
+        results = {}
+        for name, (body, content_type) in make_bodies(args.items).items():
+            client.post('/predict_batch', data=body, content_type=content_type)  # warm up
+            t0 = time.perf_counter()
+            for _ in range(args.requests):
+                resp = client.post('/predict_batch', data=body, content_type=content_type)
+                assert resp.status_code == 200, resp.get_json()
+            elapsed = time.perf_counter() - t0
+            results[name] = {
+                'body_bytes': len(body),
+                'items_per_s': args.items * args.requests / elapsed,
+                'ms_per_request': elapsed / args.requests * 1000.0,
+            }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, r in results.items():
+        print(f"{name:<14} {r['body_bytes']:>9} B  {r['items_per_s']:10.0f} items/s  {r['ms_per_request']:8.2f} ms/request")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Throughput of serve.py as the number of inference worker processes grows.
+
+For each worker count a server is started on a free port, polled until
+/readyz reports ready, and driven with concurrent /predict requests from
+several client processes (so the load generator is not GIL-bound itself).
+
+    python benchmarks/bench_serving.py --workers 1 2 4 --clients 4 --threads 16 --requests 50
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from _common import AI_DIR, latency_summary, model_dir
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url, proc, timeout=300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'server exited with status {proc.returncode}')
+        try:
+            with urllib.request.urlopen(url + '/readyz', timeout=1):
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise TimeoutError('server did not become ready')
+
+
+def client_process(url, threads, requests_per_thread, client_id, start_at):
+    latencies = []
+    lock = threading.Lock()
+
+    def run(thread_id):
+        body = json.dumps({'patientId': f'bench-{client_id}-{thread_id}', 'heartRate': 80, 'spO2': 97,
+                           'respirationRate': 14, 'temperature': 36.6}).encode()
+        local = []
+        for _ in range(requests_per_thread):
+            req = urllib.request.Request(url + '/predict', data=body, headers={'Content-Type': 'application/json'})
+            t0 = time.perf_counter()
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                resp.read()
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    time.sleep(max(0.0, start_at - time.time()))
+    pool = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return latencies
+
+
+def run_load(url, clients, threads, requests_per_thread):
+    start_at = time.time() + 0.5
+    with multiprocessing.Pool(clients) as pool:
+        t0 = time.time()
+        results = pool.starmap(client_process, [(url, threads, requests_per_thread, i, start_at)
+                                                for i in range(clients)])
+        elapsed = time.time() - max(t0, start_at)
+    return latency_summary([l for r in results for l in r], elapsed)
+
+
+def bench(workers, args):
+    port = free_port()
+    env = {**os.environ, 'TF_CPP_MIN_LOG_LEVEL': '3', 'INFERENCE_BACKEND': args.backend}
+    proc = subprocess.Popen([sys.executable, 'serve.py', '--workers', str(workers), '--port', str(port),
+                             '--host', '127.0.0.1'],
+                            cwd=AI_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    try:
+        t0 = time.perf_counter()
+        wait_ready(url, proc)
+        ready_s = time.perf_counter() - t0
+        result = run_load(url, args.clients, args.threads, args.requests)
+        result['ready_s'] = ready_s
+        with urllib.request.urlopen(url + '/batcher/stats') as resp:
+            result['avgBatchSize'] = json.load(resp)['avgBatchSize']
+        return result
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model-dir')
+    parser.add_argument('--backend', default='numpy', choices=['numpy', 'keras'])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=4, help='client processes')
+    parser.add_argument('--threads', type=int, default=16, help='threads per client process')
+    parser.add_argument('--requests', type=int, default=50, help='requests per client thread')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    with model_dir(args.model_dir):
+        results = {str(w): bench(w, args) for w in args.workers}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for workers, r in results.items():
+        print(f"{workers:>3} workers {r['throughput_rps']:8.1f} req/s  p50 {r['p50_ms']:7.2f} ms  "
+              f"p99 {r['p99_ms']:7.2f} ms  avg batch {r['avgBatchSize']:5.1f}  ready in {r['ready_s']:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
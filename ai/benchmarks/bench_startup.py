@@ -0,0 +1,76 @@
+"""Cold-start benchmark: loading a saved artifact vs. retraining on import.
+
+Each run happens in a fresh interpreter so import and TensorFlow start-up
+costs are included. Time is measured up to the first completed prediction.
+
+    python benchmarks/bench_startup.py --runs 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOAD_SNIPPET = '''
+import time
+t0 = time.perf_counter()
+import numpy as np
+import model
+m, _ = model.load_model()
+m.predict_scores(np.zeros((1, 20, 4)))
+print(time.perf_counter() - t0)
+'''
+
+# Mirrors the old behaviour of ai/model.py, which trained for 15 epochs at import.
+RETRAIN_SNIPPET = '''
+import time
+t0 = time.perf_counter()
+import numpy as np
+import train
+m = train.train_model(epochs=15)
+m.predict(np.zeros((1, 20, 4)), verbose=0)
+print(time.perf_counter() - t0)
+'''
+
+
+def time_snippet(snippet, env):
+    out = subprocess.run([sys.executable, '-c', snippet], cwd=AI_DIR, env=env,
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples):
+    return {'runs': len(samples), 'median_s': statistics.median(samples), 'min_s': min(samples), 'max_s': max(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        env = {**os.environ, 'MODEL_DIR': model_dir, 'TF_CPP_MIN_LOG_LEVEL': '3'}
+        subprocess.run([sys.executable, 'train.py', '--model-dir', model_dir, '--epochs', '1'],
+                       cwd=AI_DIR, env=env, check=True, capture_output=True)
+
+        results = {
+            'load_artifact': summarize([time_snippet(LOAD_SNIPPET, env) for _ in range(args.runs)]),
+            'retrain_on_import': summarize([time_snippet(RETRAIN_SNIPPET, env) for _ in range(args.runs)]),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, r in results.items():
+        print(f"{name:<20} median {r['median_s']:.2f}s  (min {r['min_s']:.2f}s, max {r['max_s']:.2f}s, {r['runs']} runs)")
+    speedup = results['retrain_on_import']['median_s'] / results['load_artifact']['median_s']
+    print(f'cold start speedup: {speedup:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
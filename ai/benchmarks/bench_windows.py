@@ -0,0 +1,65 @@
+"""Memory and update cost of per-patient windows at 10k and 100k patients.
+
+Every patient receives a full window's worth of readings; memory is the
+peak traced by tracemalloc while filling the windows.
+
+    python benchmarks/bench_windows.py --patients 10000 100000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+import _common  # noqa: F401  (puts the ai/ directory on sys.path)
+from windows import PatientWindows
+
+
+def run(patients, timesteps, max_mb):
+    rng = np.random.default_rng(0)
+    readings = rng.random((timesteps, 4)).astype(np.float32)
+    ids = [f'patient{i}' for i in range(patients)]
+
+    tracemalloc.start()
+    windows = PatientWindows(timesteps, 4, int(max_mb * 1024 * 1024))
+    t0 = time.perf_counter()
+    for step in range(timesteps):
+        reading = readings[step]
+        for patient_id in ids:
+            windows.push(patient_id, reading)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = windows.stats()
+    return {
+        'patients': patients,
+        'resident': stats['patients'],
+        'evictions': stats['evictions'],
+        'buffer_mb': stats['bufferBytes'] / 2 ** 20,
+        'peak_traced_mb': peak / 2 ** 20,
+        'bytes_per_patient': peak / max(stats['patients'], 1),
+        'push_us': elapsed / (patients * timesteps) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--timesteps', type=int, default=20)
+    parser.add_argument('--max-mb', type=float, default=64)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = [run(n, args.timesteps, args.max_mb) for n in args.patients]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"{r['patients']:>7} patients  resident {r['resident']:>7}  buffer {r['buffer_mb']:7.1f} MB  "
+              f"peak {r['peak_traced_mb']:7.1f} MB  {r['bytes_per_patient']:6.0f} B/patient  push {r['push_us']:.2f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+import artifacts
+
+# Besides the Keras model, every artifact carries its weights as plain .npy
+# files plus a layer spec, so the pure NumPy backend below can serve it
+# without importing TensorFlow. The .npy files are memory-mapped, so forked
+# workers share one copy of the weights.
+WEIGHTS_DIR = 'weights'
+LAYERS_FILE = 'layers.json'
+
+BACKENDS = ('keras', 'numpy')
+
+
+def export_weights(model, artifact_dir):
+    """Write the layer spec and weights of a Sequential LSTM/BatchNorm/Dense model."""
+    weights_dir = os.path.join(artifact_dir, WEIGHTS_DIR)
+    os.makedirs(weights_dir, exist_ok=True)
+    layers = []
+    for index, layer in enumerate(model.layers):
+        kind = type(layer).__name__
+        config = layer.get_config()
+        if kind == 'Dropout':
+            continue  # no-op at inference time
+        if kind == 'LSTM':
+            spec = {'type': 'lstm', 'units': config['units'], 'activation': config['activation'],
+                    'recurrentActivation': config['recurrent_activation'], 'returnSequences': config['return_sequences']}
+            names = ['kernel', 'recurrent_kernel', 'bias']
+        elif kind == 'BatchNormalization':
+            spec = {'type': 'batch_norm', 'epsilon': config['epsilon']}
+            names = ['gamma', 'beta', 'moving_mean', 'moving_variance']
+        elif kind == 'Dense':
+            spec = {'type': 'dense', 'activation': config['activation']}
+            names = ['kernel', 'bias']
+        else:
+            raise ValueError(f'Layer type {kind} is not supported by the NumPy backend')
+        spec['weights'] = []
+        for name, value in zip(names, layer.get_weights()):
+            filename = f'{index:02d}_{name}.npy'
+            np.save(os.path.join(weights_dir, filename), value.astype(np.float32))
+            spec['weights'].append(filename)
+        layers.append(spec)
+    with open(os.path.join(weights_dir, LAYERS_FILE), 'w') as f:
+        json.dump(layers, f, indent=2)
+
+
+ACTIVATIONS = {
+    'relu': lambda x: np.maximum(x, 0.0),
+    'sigmoid': lambda x: 0.5 * (1.0 + np.tanh(0.5 * x)),  # same as 1 / (1 + e^-x), without overflow
+    'tanh': np.tanh,
+    'linear': lambda x: x,
+}
+
+
+class KerasBackend:
+    name = 'keras'
+
+    def __init__(self, model_dir, version=None):
+        self.model, self.metadata = artifacts.load_artifact(model_dir, version)
+
+    def predict_scores(self, batch):
+        # Calling the model directly skips the per-call setup model.predict() does,
+        # which dominates for the small batches served here.
+        return np.asarray(self.model(batch.astype(np.float32), training=False))[:, 0]
+
+
+class NumpyBackend:
+    """Forward pass of the saved LSTM/BatchNorm/Dense stack in NumPy, matching Keras inference."""
+    name = 'numpy'
+
+    def __init__(self, model_dir, version=None, mmap=True):
+        self.metadata = artifacts.load_metadata(model_dir, version)
+        weights_dir = os.path.join(model_dir, self.metadata['version'], WEIGHTS_DIR)
+        if not os.path.isfile(os.path.join(weights_dir, LAYERS_FILE)):
+            raise artifacts.ArtifactNotFoundError(
+                f"Model {self.metadata['version']} has no exported weights; run `python inference.py` to export them")
+        with open(os.path.join(weights_dir, LAYERS_FILE)) as f:
+            specs = json.load(f)
+        mmap_mode = 'r' if mmap else None
+        self.layers = []
+        for spec in specs:
+            weights = [np.load(os.path.join(weights_dir, name), mmap_mode=mmap_mode) for name in spec['weights']]
+            if spec['type'] == 'batch_norm':
+                # Fold the four BatchNorm vectors into one scale and shift
+                gamma, beta, mean, variance = weights
+                scale = gamma / np.sqrt(variance + spec['epsilon'])
+                weights = [scale.astype(np.float32), (beta - mean * scale).astype(np.float32)]
+            self.layers.append((spec, weights))
+
+    def _lstm(self, x, spec, kernel, recurrent_kernel, bias):
+        batch, timesteps, _ = x.shape
+        units = spec['units']
+        activation = ACTIVATIONS[spec['activation']]
+        recurrent_activation = ACTIVATIONS[spec['recurrentActivation']]
+        # Input projections for every timestep in one matmul; gates are ordered i, f, c, o
+        projected = x @ kernel + bias
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        outputs = np.empty((batch, timesteps, units), dtype=np.float32) if spec['returnSequences'] else None
+        for t in range(timesteps):
+            z = projected[:, t] + h @ recurrent_kernel
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units:2 * units])
+            o = recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * activation(z[:, 2 * units:3 * units])
+            h = o * activation(c)
+            if outputs is not None:
+                outputs[:, t] = h
+        return outputs if outputs is not None else h
+
+    def predict_scores(self, batch):
+        x = np.asarray(batch, dtype=np.float32)
+        for spec, weights in self.layers:
+            if spec['type'] == 'lstm':
+                x = self._lstm(x, spec, *weights)
+            elif spec['type'] == 'batch_norm':
+                scale, shift = weights
+                x = x * scale + shift
+            else:
+                kernel, bias = weights
+                x = ACTIVATIONS[spec['activation']](x @ kernel + bias)
+        return x[:, 0]
+
+
+def load_backend(name, model_dir, version=None):
+    if name == 'keras':
+        return KerasBackend(model_dir, version)
+    if name == 'numpy':
+        return NumpyBackend(model_dir, version)
+    raise ValueError(f'Unknown inference backend {name!r}; expected one of {", ".join(BACKENDS)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export NumPy weights for a saved model artifact')
+    parser.add_argument('--model-dir', default=os.environ.get('MODEL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'saved_models')))
+    parser.add_argument('--version', help='defaults to the newest artifact')
+    args = parser.parse_args()
+
+    model, metadata = artifacts.load_artifact(args.model_dir, args.version)
+    export_weights(model, os.path.join(args.model_dir, metadata['version']))
+    print(f"Exported NumPy weights for model {metadata['version']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,30 +1,136 @@
+import os
+import threading
+
 import numpy as np
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout, BatchNormalization
 from flask import Flask, request, jsonify
 
+import artifacts
+import inference
+import metrics
+import vitals as vitals_parser
+from batcher import MicroBatcher
+from windows import PatientWindows
+
 app = Flask(__name__)
 
-def create_model():
-    model = Sequential([
-        LSTM(128, activation='relu', input_shape=(20, 4), return_sequences=True),
-        BatchNormalization(),
-        Dropout(0.3),
-        LSTM(64, activation='relu', return_sequences=False),
-        BatchNormalization(),
-        Dropout(0.3),
-        Dense(32, activation='relu'),
-        Dense(1, activation='sigmoid')
-    ])
-    model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
-    
-    # Dummy training data (replace with real data)
-    X_train = np.random.rand(1000, 20, 4)  # 1000 samples, 20 timesteps, 4 features
-    y_train = np.random.randint(0, 2, 1000)  # Binary labels
-    model.fit(X_train, y_train, epochs=15, batch_size=32, verbose=0)
-    return model
-
-model = create_model()
+# Prometheus metrics, served at /metrics
+metrics_registry = metrics.Registry()
+inference_seconds = metrics_registry.histogram('model_inference_duration_seconds', 'Time for one forward pass over a batch', ['backend'])
+batch_size = metrics_registry.histogram('model_batch_size', 'Samples per forward pass', buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096))
+errors_total = metrics_registry.counter('errors_total', 'Exceptions caught in HTTP routes', ['route'])
+# Opt-in: GET /debug/profile?seconds=N returns sampled stacks for flame graphs
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0') == '1'
+http_request_seconds = metrics.instrument_app(app, metrics_registry, PROFILING_ENABLED)
+
+
+def report_error(e):
+    app.logger.exception('Error in %s', request.path)
+    errors_total.inc(request.url_rule.rule if request.url_rule else request.path)
+    return jsonify({'error': str(e)}), 500
+
+
+MODEL_DIR = os.environ.get('MODEL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'saved_models'))
+MODEL_VERSION = os.environ.get('MODEL_VERSION')  # pin a version, defaults to the newest artifact
+# 'keras' runs the saved Keras model; 'numpy' runs the exported weights
+# without importing TensorFlow at all
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras')
+
+# Concurrent /predict calls are coalesced into one forward pass; set
+# BATCHING=0 to run each request through the model on its own.
+BATCHING = os.environ.get('BATCHING', '1') != '0'
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', '64'))
+BATCH_MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', '5'))
+PREDICT_BATCH_MAX_ITEMS = int(os.environ.get('PREDICT_BATCH_MAX_ITEMS', '10000'))
+
+# Readings that carry a patientId are appended to that patient's in-memory
+# window, and the model scores the real recent history instead of one
+# reading repeated. The window length is the model's input length.
+WINDOW_MAX_MB = float(os.environ.get('WINDOW_MAX_MB', '64'))
+WINDOW_TTL_S = float(os.environ.get('WINDOW_TTL_S', '900'))
+
+# The model is loaded from the newest saved artifact on first use instead of
+# being trained at import time; run `python train.py` to produce one.
+_model = None
+_metadata = None
+_windows = None
+_model_lock = threading.Lock()
+
+# Set once warm_up() (or serve.py's worker pool) has run a first inference
+ready = threading.Event()
+
+
+def load_model():
+    global _model, _metadata
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                backend = inference.load_backend(INFERENCE_BACKEND, MODEL_DIR, MODEL_VERSION)
+                _model, _metadata = backend, backend.metadata
+    return _model, _metadata
+
+
+def load_metadata():
+    # Threshold and input shape only; doesn't load the model itself, so a
+    # front end that dispatches to worker processes never has to.
+    global _metadata
+    if _metadata is None:
+        _metadata = artifacts.load_metadata(MODEL_DIR, MODEL_VERSION)
+    return _metadata
+
+
+def local_scores(batch):
+    model, _ = load_model()
+    return model.predict_scores(batch)
+
+
+_scorer = local_scores
+
+
+def predict_scores(batch):
+    batch_size.observe(len(batch))
+    with inference_seconds.time(INFERENCE_BACKEND):
+        return _scorer(batch)
+
+
+def warm_up():
+    predict_scores(np.zeros((1, load_metadata()['inputShape'][0], len(artifacts.FEATURE_ORDER)), dtype=np.float32))
+    ready.set()
+
+
+batcher = MicroBatcher(predict_scores, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS) if BATCHING else None
+
+
+def use_scorer(scorer, batch_threads=1):
+    """Route inference through scorer, e.g. a process pool, with batch_threads batches in flight."""
+    global _scorer, batcher
+    _scorer = scorer
+    if batcher is not None:
+        previous, batcher = batcher, MicroBatcher(predict_scores, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, batch_threads)
+        previous.close()
+
+
+def patient_windows():
+    # Created on first use, sized from the artifact's inputShape so windows
+    # always match what the model expects
+    global _windows
+    if _windows is None:
+        timesteps = load_metadata()['inputShape'][0]
+        with _model_lock:
+            if _windows is None:
+                _windows = PatientWindows(timesteps, len(artifacts.FEATURE_ORDER), int(WINDOW_MAX_MB * 1024 * 1024), WINDOW_TTL_S)
+    return _windows
+
+
+metrics_registry.gauge('batcher_queue_depth', 'Samples waiting for the micro-batcher',
+                       lambda: batcher.stats()['queueDepth'] if batcher is not None else 0)
+metrics_registry.gauge('patient_windows', 'Patient windows held in memory', lambda: _windows.stats()['patients'] if _windows is not None else 0)
+
+
+def score(sample):
+    if batcher is not None:
+        return batcher.submit(sample)
+    return predict_scores(sample[np.newaxis])[0]
+
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -43,20 +149,107 @@ def predict():
         except (ValueError, KeyError) as e:
             return jsonify({'error': f'Invalid numeric value: {str(e)}'}), 400
 
-        # Prepare input (simulate 20 timesteps with recent data)
-        vitals = np.array([[heart_rate, spO2, respiration_rate, temperature]])
-        input_data = np.repeat(vitals, 20, axis=0).reshape(1, 20, 4)
+        try:
+            metadata = load_metadata()
+        except artifacts.ArtifactNotFoundError as e:
+            return jsonify({'error': str(e)}), 503
+
+        # Prepare input: the patient's recent window, or the reading repeated
+        # across all timesteps when no patientId is given
+        vitals = np.array([heart_rate, spO2, respiration_rate, temperature])
+        if data.get('patientId') is not None:
+            input_data = patient_windows().push(str(data['patientId']), vitals)
+        else:
+            input_data = np.repeat(vitals[np.newaxis], metadata['inputShape'][0], axis=0)
 
         # Predict anomaly score
-        anomaly_score = model.predict(input_data, verbose=0)[0][0]
-        prediction = 'Critical' if anomaly_score > 0.7 else 'Normal'
+        anomaly_score = score(input_data)
+        prediction = 'Critical' if anomaly_score > metadata['threshold'] else 'Normal'
 
         return jsonify({
             'anomalyScore': float(anomaly_score),
             'prediction': prediction
         })
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return report_error(e)
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    # Scores many readings in one forward pass. The body is either JSON (a
+    # list of readings or a columnar object) or a raw .npy array of shape
+    # (N, 4) / (N, 20, 4). Invalid items get an error entry in place.
+    try:
+        try:
+            if request.mimetype in vitals_parser.NPY_CONTENT_TYPES:
+                values, errors, patient_ids = vitals_parser.parse_npy_readings(request.get_data())
+            else:
+                values, errors, patient_ids = vitals_parser.parse_json_readings(request.get_json(force=True, silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if len(values) > PREDICT_BATCH_MAX_ITEMS:
+            return jsonify({'error': f'Batch too large: {len(values)} items (max {PREDICT_BATCH_MAX_ITEMS})'}), 413
+
+        try:
+            metadata = load_metadata()
+        except artifacts.ArtifactNotFoundError as e:
+            return jsonify({'error': str(e)}), 503
+
+        try:
+            inputs = vitals_parser.to_model_input(values, metadata['inputShape'][0])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        valid = np.ones(len(values), dtype=bool)
+        valid[list(errors)] = False
+        scores = np.empty(len(values))
+        if valid.any():
+            if patient_ids is not None and values.ndim == 2:
+                windows = patient_windows()
+                for i in np.flatnonzero(valid):
+                    if patient_ids[i] is not None:
+                        inputs[i] = windows.push(str(patient_ids[i]), values[i])
+            scores[valid] = predict_scores(inputs[valid])
+
+        results = []
+        for i, anomaly_score in enumerate(scores.tolist()):
+            if i in errors:
+                results.append({'error': errors[i]})
+            else:
+                results.append({
+                    'anomalyScore': anomaly_score,
+                    'prediction': 'Critical' if anomaly_score > metadata['threshold'] else 'Normal'
+                })
+        return jsonify({'results': results, 'count': len(results), 'errors': len(errors)})
+    except Exception as e:
+        return report_error(e)
+
+@app.route('/batcher/stats', methods=['GET'])
+def batcher_stats():
+    if batcher is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **batcher.stats()})
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    # Ready once a warm-up inference has completed
+    body = {'ready': ready.is_set(), 'backend': INFERENCE_BACKEND}
+    if _metadata is not None:
+        body['modelVersion'] = _metadata['version']
+    return jsonify(body), 200 if ready.is_set() else 503
+
+@app.route('/windows/stats', methods=['GET'])
+def windows_stats():
+    try:
+        return jsonify(patient_windows().stats())
+    except artifacts.ArtifactNotFoundError as e:
+        return jsonify({'error': str(e)}), 503
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Load eagerly when serving so the first request doesn't pay for it.
+    # For multi-process production serving use serve.py instead.
+    warm_up()
+    app.run(host='0.0.0.0', port=5000, debug=True)
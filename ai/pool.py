@@ -0,0 +1,81 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import inference
+
+# Per-process model; set in the parent before forking (shared copy-on-write)
+# or loaded by the worker initializer.
+_backend = None
+_ready_count = None
+
+
+def _init_worker(backend_name, model_dir, version, timesteps, ready_count):
+    global _backend, _ready_count
+    _ready_count = ready_count
+    if _backend is None:
+        _backend = inference.load_backend(backend_name, model_dir, version)
+    _backend.predict_scores(np.zeros((1, timesteps, 4), dtype=np.float32))
+    with ready_count.get_lock():
+        ready_count.value += 1
+
+
+def _wait_until_warm(workers, deadline):
+    # Holding a worker until every worker is warm makes the pool start all of
+    # them instead of reusing the first idle one.
+    while _ready_count.value < workers and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def _predict(batch):
+    return _backend.predict_scores(batch)
+
+
+class InferencePool:
+    """A pool of worker processes that each hold a warm copy of the model.
+
+    With the NumPy backend the model is loaded once in the parent and the
+    workers are forked from it, so the memory-mapped weights are shared
+    copy-on-write. The Keras backend isn't fork-safe, so its workers are
+    spawned and each loads the model itself.
+    """
+
+    def __init__(self, workers, backend_name, model_dir, version=None, timesteps=20):
+        global _backend
+        self.workers = workers
+        use_fork = backend_name == 'numpy' and 'fork' in multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if use_fork else 'spawn')
+        if use_fork:
+            _backend = inference.load_backend(backend_name, model_dir, version)
+        self._ready_count = context.Value('i', 0)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(backend_name, model_dir, version, timesteps, self._ready_count),
+        )
+
+    @property
+    def warm_workers(self):
+        return self._ready_count.value
+
+    @property
+    def ready(self):
+        return self.warm_workers >= self.workers
+
+    def warm_up(self, timeout=300):
+        """Start every worker and wait until each has run a warm-up inference."""
+        deadline = time.monotonic() + timeout
+        futures = [self._executor.submit(_wait_until_warm, self.workers, deadline)
+                   for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+        return self.ready
+
+    def predict_scores(self, batch):
+        return self._executor.submit(_predict, batch).result()
+
+    def shutdown(self):
+        self._executor.shutdown()
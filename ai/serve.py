@@ -0,0 +1,50 @@
+"""Production serving for the anomaly model.
+
+    python serve.py --workers 4 --port 5000
+
+The Flask app from model.py runs on a multithreaded waitress server.
+Inference is dispatched to a pool of warm worker processes (see pool.py),
+so scoring is not limited to one core by the GIL. The micro-batcher keeps
+one batch in flight per worker. /readyz returns 503 until every worker
+has finished its warm-up inference; /healthz only checks that the process
+is up.
+"""
+import argparse
+import os
+import threading
+
+from waitress import serve
+
+import model
+from pool import InferencePool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('INFERENCE_WORKERS', os.cpu_count() or 1)))
+    parser.add_argument('--threads', type=int, default=None, help='HTTP threads (default: 8 per worker)')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', '5000')))
+    args = parser.parse_args()
+
+    metadata = model.load_metadata()
+    pool = InferencePool(args.workers, model.INFERENCE_BACKEND, model.MODEL_DIR, metadata['version'],
+                         metadata['inputShape'][0])
+    model.use_scorer(pool.predict_scores, batch_threads=args.workers)
+
+    def warm_up():
+        if pool.warm_up():
+            model.ready.set()
+            print(f"{args.workers} {model.INFERENCE_BACKEND} workers warm, serving model {metadata['version']}", flush=True)
+        else:
+            print(f'Only {pool.warm_workers}/{args.workers} workers warmed up in time', flush=True)
+
+    threading.Thread(target=warm_up, daemon=True).start()
+    try:
+        serve(model.app, host=args.host, port=args.port, threads=args.threads or 8 * args.workers)
+    finally:
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
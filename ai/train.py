@@ -0,0 +1,55 @@
+import argparse
+import os
+
+import numpy as np
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.layers import LSTM, Dense, Dropout, BatchNormalization
+
+import artifacts
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'saved_models')
+
+
+def build_model(timesteps=20, features=4):
+    model = Sequential([
+        LSTM(128, activation='relu', input_shape=(timesteps, features), return_sequences=True),
+        BatchNormalization(),
+        Dropout(0.3),
+        LSTM(64, activation='relu', return_sequences=False),
+        BatchNormalization(),
+        Dropout(0.3),
+        Dense(32, activation='relu'),
+        Dense(1, activation='sigmoid')
+    ])
+    model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
+    return model
+
+
+def train_model(epochs=15, samples=1000, batch_size=32, seed=None):
+    rng = np.random.default_rng(seed)
+    model = build_model()
+    # Dummy training data (replace with real data)
+    X_train = rng.random((samples, 20, 4))  # samples, 20 timesteps, 4 features
+    y_train = rng.integers(0, 2, samples)  # Binary labels
+    model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, verbose=0)
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the vitals anomaly model and save a versioned artifact')
+    parser.add_argument('--model-dir', default=os.environ.get('MODEL_DIR', DEFAULT_MODEL_DIR))
+    parser.add_argument('--epochs', type=int, default=15)
+    parser.add_argument('--samples', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    model = train_model(args.epochs, args.samples, args.batch_size, args.seed)
+    version = artifacts.save_artifact(model, args.model_dir, {
+        'training': {'epochs': args.epochs, 'samples': args.samples, 'batchSize': args.batch_size, 'seed': args.seed},
+    })
+    print(f'Saved model {version} to {args.model_dir}')
+
+
+if __name__ == '__main__':
+    main()
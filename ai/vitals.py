@@ -0,0 +1,88 @@
+import io
+
+import numpy as np
+
+from artifacts import FEATURE_ORDER
+
+NPY_CONTENT_TYPES = ('application/x-npy', 'application/octet-stream')
+
+
+def _to_float_column(values):
+    # Fast path: NumPy parses numbers, numeric strings (whitespace included)
+    # and None (-> NaN) in one call. Only when that fails, or when nested
+    # lists give it more than one dimension, do we fall back to element-wise
+    # parsing to find which entries are bad.
+    try:
+        column = np.asarray(values, dtype=np.float64)
+        if column.shape == (len(values),):
+            return column
+    except (TypeError, ValueError):
+        pass
+    column = np.empty(len(values), dtype=np.float64)
+    for i, value in enumerate(values):
+        try:
+            column[i] = float(str(value).strip()) if value is not None else np.nan
+        except (TypeError, ValueError):
+            column[i] = np.nan
+    return column
+
+
+def parse_json_readings(payload):
+    """Parse a JSON batch into an (N, 4) float array, per-item errors and patient ids.
+
+    Accepts either a list of reading objects (optionally wrapped as
+    {"readings": [...]}) or a columnar object mapping each feature name to a
+    list of values. Patient ids are optional; entries without one are None.
+    """
+    if isinstance(payload, dict) and 'readings' in payload:
+        payload = payload['readings']
+
+    if isinstance(payload, list):
+        errors = {i: 'Reading must be an object' for i, item in enumerate(payload) if not isinstance(item, dict)}
+        items = [item if isinstance(item, dict) else {} for item in payload]
+        columns = [[item.get(field) for item in items] for field in FEATURE_ORDER]
+        patient_ids = [item.get('patientId') for item in items]
+    elif isinstance(payload, dict) and all(isinstance(payload.get(field), list) for field in FEATURE_ORDER):
+        errors = {}
+        columns = [payload[field] for field in FEATURE_ORDER]
+        patient_ids = payload.get('patientId')
+        if patient_ids is None:
+            patient_ids = [None] * len(columns[0])
+        elif not isinstance(patient_ids, list):
+            raise ValueError('patientId of a columnar payload must be a list with one id per reading')
+        if len({len(column) for column in columns + [patient_ids]}) != 1:
+            raise ValueError('Columnar payload must have equal-length columns')
+    else:
+        raise ValueError('Expected a list of readings or a columnar object keyed by ' + ', '.join(FEATURE_ORDER))
+
+    values = np.stack([_to_float_column(column) for column in columns], axis=-1)
+    return values, _merge_errors(values, errors), patient_ids
+
+
+def parse_npy_readings(body):
+    """Parse a .npy body of shape (N, 4) or (N, timesteps, 4); it carries no patient ids."""
+    values = np.load(io.BytesIO(body), allow_pickle=False)
+    if values.ndim not in (2, 3) or values.shape[-1] != len(FEATURE_ORDER):
+        raise ValueError(f'Expected an array of shape (N, {len(FEATURE_ORDER)}) or (N, timesteps, {len(FEATURE_ORDER)}), got {values.shape}')
+    values = values.astype(np.float64, copy=False)
+    return values, _merge_errors(values, {}), None
+
+
+def _merge_errors(values, errors):
+    finite = np.isfinite(values)
+    if values.ndim == 3:
+        finite = finite.all(axis=1)
+    for i in np.flatnonzero(~finite.all(axis=-1)):
+        if i not in errors:
+            bad = [FEATURE_ORDER[j] for j in np.flatnonzero(~finite[i])]
+            errors[int(i)] = 'Missing or invalid numeric value for ' + ', '.join(bad)
+    return errors
+
+
+def to_model_input(values, timesteps):
+    # Readings without history are repeated across the window.
+    if values.ndim == 2:
+        return np.repeat(values[:, np.newaxis, :], timesteps, axis=1)
+    if values.shape[1] != timesteps:
+        raise ValueError(f'Expected windows of {timesteps} timesteps, got {values.shape[1]}')
+    return values
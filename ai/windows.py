@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PatientWindows:
+    """Per-patient sliding windows of the most recent readings.
+
+    All windows live in one preallocated (slots, timesteps, features) slab,
+    used as a ring buffer per slot, so recording a reading is a single row
+    write. Patients are kept in LRU order: the least recently updated one is
+    evicted when the memory cap is reached, and idle patients past the TTL
+    are dropped as new readings come in.
+    """
+
+    def __init__(self, timesteps=20, features=4, max_bytes=64 * 1024 * 1024, ttl_s=900, dtype=np.float32,
+                 initial_slots=1024):
+        self.timesteps = timesteps
+        self.features = features
+        self.ttl_s = ttl_s
+        self.dtype = np.dtype(dtype)
+        self.max_slots = max(1, max_bytes // (timesteps * features * self.dtype.itemsize))
+        self._lock = threading.Lock()
+        self._slots = OrderedDict()  # patient_id -> slot, least recently updated first
+        self._free = []
+        self._allocate(min(initial_slots, self.max_slots))
+        self.evictions = 0
+        self.expirations = 0
+
+    def _allocate(self, capacity):
+        self._buffer = np.empty((capacity, self.timesteps, self.features), dtype=self.dtype)
+        self._head = np.zeros(capacity, dtype=np.int32)  # next row to overwrite == oldest row
+        self._last_seen = np.zeros(capacity, dtype=np.float64)
+        self._free.extend(range(capacity - 1, -1, -1))
+
+    def _grow(self):
+        # Double the slab (up to the cap); existing slots keep their indices.
+        old_buffer, old_head, old_last_seen = self._buffer, self._head, self._last_seen
+        size = len(old_buffer)
+        capacity = min(size * 2, self.max_slots)
+        self._buffer = np.empty((capacity, self.timesteps, self.features), dtype=self.dtype)
+        self._buffer[:size] = old_buffer
+        self._head = np.zeros(capacity, dtype=np.int32)
+        self._head[:size] = old_head
+        self._last_seen = np.zeros(capacity, dtype=np.float64)
+        self._last_seen[:size] = old_last_seen
+        self._free.extend(range(capacity - 1, size - 1, -1))
+
+    def _expire(self, now):
+        while self._slots:
+            patient_id, slot = next(iter(self._slots.items()))
+            if now - self._last_seen[slot] <= self.ttl_s:
+                break
+            del self._slots[patient_id]
+            self._free.append(slot)
+            self.expirations += 1
+
+    def _acquire_slot(self, patient_id):
+        if not self._free:
+            if len(self._buffer) < self.max_slots:
+                self._grow()
+            else:
+                _, slot = self._slots.popitem(last=False)
+                self.evictions += 1
+                self._free.append(slot)
+        slot = self._free.pop()
+        self._slots[patient_id] = slot
+        return slot
+
+    def _ordered(self, slot):
+        head = self._head[slot]
+        return np.concatenate((self._buffer[slot, head:], self._buffer[slot, :head]))
+
+    def push(self, patient_id, reading):
+        """Record a reading and return the patient's window, oldest row first."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            slot = self._slots.get(patient_id)
+            if slot is None:
+                # Until real history accumulates, a new window is padded with
+                # its first reading.
+                slot = self._acquire_slot(patient_id)
+                self._buffer[slot] = reading
+                self._head[slot] = 0
+            else:
+                self._slots.move_to_end(patient_id)
+                head = self._head[slot]
+                self._buffer[slot, head] = reading
+                self._head[slot] = (head + 1) % self.timesteps
+            self._last_seen[slot] = now
+            return self._ordered(slot)
+
+    def window(self, patient_id):
+        with self._lock:
+            slot = self._slots.get(patient_id)
+            return None if slot is None else self._ordered(slot)
+
+    def discard(self, patient_id):
+        with self._lock:
+            slot = self._slots.pop(patient_id, None)
+            if slot is not None:
+                self._free.append(slot)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'patients': len(self._slots),
+                'capacity': len(self._buffer),
+                'maxPatients': self.max_slots,
+                'bufferBytes': self._buffer.nbytes,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'ttlSeconds': self.ttl_s,
+            }
@@ -0,0 +1,89 @@
+import os
+import sys
+import threading
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def get_db(mongo_uri, name='healthsync_bench'):
+    """A fresh benchmark database on mongod, or an in-memory one for mongomock://."""
+    if mongo_uri.startswith('mongomock://'):
+        import mongomock
+        client = mongomock.MongoClient()
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(mongo_uri)
+    client.drop_database(name)
+    return client[name]
+
+
+def latency_summary(latencies_s, elapsed_s):
+    ms = np.asarray(latencies_s) * 1000.0
+    return {
+        'requests': int(ms.size),
+        'throughput_rps': ms.size / elapsed_s if elapsed_s else 0.0,
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+    }
+
+
+MOCK_COMMANDS = ('find', 'find_one', 'find_one_and_update', 'aggregate', 'distinct', 'count_documents',
+                 'insert_one', 'insert_many', 'update_one', 'update_many', 'bulk_write', 'delete_one', 'delete_many')
+
+
+class CommandCounter:
+    """Counts database commands issued from now on, for clients created afterwards.
+
+    On mongod this is pymongo command monitoring, so every round trip
+    (getMore included) counts. mongomock has no command monitoring; there
+    each outermost call of a Collection method in MOCK_COMMANDS counts once.
+    """
+
+    def __init__(self, mongo_uri):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._depth = threading.local()
+        if mongo_uri.startswith('mongomock://'):
+            self._wrap_mongomock()
+        else:
+            from pymongo import monitoring
+
+            counter = self
+
+            class Listener(monitoring.CommandListener):
+                def started(self, event):
+                    counter._add()
+
+                def succeeded(self, event):
+                    pass
+
+                def failed(self, event):
+                    pass
+
+            monitoring.register(Listener())
+
+    def _add(self):
+        with self._lock:
+            self.count += 1
+
+    def _wrap_mongomock(self):
+        from mongomock.collection import Collection
+        for name in MOCK_COMMANDS:
+            method = getattr(Collection, name)
+
+            def counted(*args, __method=method, **kwargs):
+                # find_one() calls find(); only the outermost call is a command
+                depth = getattr(self._depth, 'value', 0)
+                if depth == 0:
+                    self._add()
+                self._depth.value = depth + 1
+                try:
+                    return __method(*args, **kwargs)
+                finally:
+                    self._depth.value = depth
+            setattr(Collection, name, counted)
@@ -0,0 +1,68 @@
+"""Reconnect payload size and latency for community chat at 100k messages per channel.
+
+"embedded" is the old layout: every message $push'ed into the community
+document, and the whole channel returned on connect. "fresh" is a client
+without history getting the recent tail from ChatStore. "behind" is a
+reconnecting client --behind messages behind, syncing with since(seq).
+
+    python benchmarks/bench_chat_sync.py --messages 100000 --behind 20
+"""
+import argparse
+import json
+import time
+
+from _common import get_db, latency_summary
+from chat import ChatStore
+
+
+def message(i):
+    return {"id": i, "author": f"Dr. User{i % 50}", "content": f"message {i} " + "x" * 80,
+            "timestamp": "2026-01-01T00:00:00"}
+
+
+def measure(fn, repeats):
+    latencies = []
+    payload = 0
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        t = time.perf_counter()
+        payload = len(json.dumps(fn(), default=str))
+        latencies.append(time.perf_counter() - t)
+    result = latency_summary(latencies, time.perf_counter() - t0)
+    result['payload_bytes'] = payload
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-uri', default='mongomock://')
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--behind', type=int, default=20, help='messages a reconnecting client missed')
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    db = get_db(args.mongo_uri)
+    messages = [message(i) for i in range(args.messages)]
+    db['communities'].insert_one({"type": "Global", "location": None, "messages": {"general": messages}})
+    store = ChatStore(db)
+    for start in range(0, len(messages), 10000):
+        store.append_many("Global", "general", messages[start:start + 10000])
+    # Indexed after seeding: mongomock checks unique indexes on insert by scanning
+    store.ensure_indexes()
+    last_seen = store.latest_seq("Global", "general") - args.behind
+
+    results = {
+        'embedded': measure(lambda: db['communities'].find_one({"type": "Global", "location": None})['messages']['general'], args.repeats),
+        'fresh': measure(lambda: store.since("Global", "general", None, store.tail_size), args.repeats),
+        'behind': measure(lambda: store.since("Global", "general", last_seen), args.repeats),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, r in results.items():
+        print(f"{name:<9} {r['payload_bytes'] / 1024:10.1f} KiB  p50 {r['p50_ms']:8.2f} ms  p99 {r['p99_ms']:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Socket.IO fan-out per vitals tick: everyone subscribed vs. per-patient rooms.
+
+Simulated clients connect through Flask-SocketIO's in-process test client.
+In "all" mode every client subscribes to every patient, which is what the
+old broadcast=True emits did. In "rooms" mode each client follows only
+--follow patients. Each tick emits one reading per patient, and the run
+reports messages delivered and server CPU time per tick.
+
+    python benchmarks/bench_fanout.py --clients 200 --patients 100 --ticks 20
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault('MONGO_URI', 'mongomock://')
+
+from _common import BACKEND_DIR  # noqa: F401  (puts backend/ on sys.path)
+import model
+from rooms import patient_rooms
+
+
+def run(mode, clients, patients, follow, ticks):
+    test_clients = []
+    for i in range(clients):
+        client = model.socketio.test_client(model.app)
+        if mode == 'all':
+            client.emit('subscribe', {'patients': '*'})
+        else:
+            client.emit('subscribe', {'patients': [f'patient{(i + k) % patients}' for k in range(follow)]})
+        client.get_received()
+        test_clients.append(client)
+
+    delivered = 0
+    cpu = 0.0
+    for tick in range(ticks):
+        t0 = time.process_time()
+        for p in range(patients):
+            vitals = {"patientId": f"patient{p}", "heartRate": 70 + tick % 30, "spO2": 97, "timestamp": "2026-01-01T00:00:00"}
+            model.socketio.emit('vitalsUpdate', vitals, to=patient_rooms(vitals['patientId']))
+        cpu += time.process_time() - t0
+        delivered += sum(len(c.get_received()) for c in test_clients)
+
+    for client in test_clients:
+        client.disconnect()
+    return {'messages_per_tick': delivered / ticks, 'server_cpu_ms_per_tick': cpu / ticks * 1000.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--patients', type=int, default=100)
+    parser.add_argument('--follow', type=int, default=3, help='patients each client follows in rooms mode')
+    parser.add_argument('--ticks', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = {mode: run(mode, args.clients, args.patients, args.follow, args.ticks) for mode in ('all', 'rooms')}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for mode, r in results.items():
+        print(f"{mode:<6} {r['messages_per_tick']:10.0f} messages/tick  {r['server_cpu_ms_per_tick']:8.2f} ms CPU/tick")
+
+
+if __name__ == '__main__':
+    main()
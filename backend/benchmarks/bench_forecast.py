@@ -0,0 +1,144 @@
+"""Cohort forecast job: vectorized chunks vs. one patient at a time, full vs. incremental.
+
+Seeds --patients patients with --readings readings each over the last
+--hours hours. The per-patient baseline queries each patient's readings
+separately and computes the same statistics with NumPy one patient at a
+time. The job is then timed on a full run, and on an incremental run after
+--updated patients got a new reading. Last, the forecast lookup latency is
+measured. Before any timing, the run checks that a patient whose heart rate
+and SpO2 are out of range gets a higher label than one whose vitals are in
+range, and that a patient whose readings stop becomes Unknown once they
+have left the window.
+
+    python benchmarks/bench_forecast.py --patients 1000 --readings 120 --updated 10
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from _common import get_db, latency_summary
+import forecast
+from forecast import ForecastJob, cohort_stats, risk_label, risk_scores
+from vitals_store import NUMERIC_FIELDS, VitalsStore, to_utc
+
+
+def seed(store, patients, readings, hours, now):
+    rng = random.Random(0)
+    batch = []
+    for p in range(patients):
+        for k in range(readings):
+            ts = now - timedelta(hours=hours) + timedelta(seconds=k * hours * 3600 / readings)
+            batch.append({"patientId": f"patient{p}", "timestamp": ts.isoformat(), "heartRate": 60 + rng.random() * 60,
+                          "spO2": 90 + rng.random() * 10, "respirationRate": 12 + rng.random() * 10,
+                          "temperature": 36 + rng.random() * 2, "anomalyScore": rng.random()})
+        if len(batch) >= 50000:
+            store.append_many(batch)
+            batch = []
+    store.append_many(batch)
+
+
+def check_out_of_range_label():
+    # Two patients sending only heartRate and spO2, like the simulator; the
+    # second is out of range on every reading
+    n = 10
+    values = np.full((2 * n, len(NUMERIC_FIELDS)), np.nan)
+    hr, spo2, a = (NUMERIC_FIELDS.index(f) for f in ('heartRate', 'spO2', 'anomalyScore'))
+    values[:n, hr], values[:n, spo2] = 75, 98
+    values[n:, hr], values[n:, spo2] = 150, 85
+    values[:, a] = 0.1
+    idx = np.repeat(np.arange(2), n)
+    stats = cohort_stats(idx, np.linspace(2, 0, 2 * n), values, 2)
+    risk = risk_scores(stats, np.zeros(2))
+    labels = [risk_label(risk[i], n) for i in range(2)]
+    order = ['Low', 'Moderate', 'High']
+    assert order.index(labels[1]) > order.index(labels[0]), f"out-of-range vitals didn't raise the label: {labels}, {risk}"
+
+
+def check_silent_patient_unknown():
+    # Scored High, then no readings for longer than the window
+    db = get_db('mongomock://')
+    store = VitalsStore(db)
+    job = ForecastJob(db, store)
+    now = datetime.now()
+    store.append_many([{"patientId": "silent", "timestamp": (now - timedelta(minutes=k)).isoformat(), "heartRate": 150,
+                        "spO2": 85, "anomalyScore": 0.95} for k in range(10)])
+    job.run(now=now)
+    # A second run past the overlap, so the readings don't count as new below
+    job.run(now=now + timedelta(seconds=2 * forecast.RUN_OVERLAP_S))
+    assert job.get("silent")['riskScore'] == 'High', job.get("silent")
+    later = now + timedelta(seconds=job.window_s * 3)
+    run = job.run(now=later)
+    result = job.get("silent")
+    assert run['patients'] == 1 and result['riskScore'] == 'Unknown', (run, result)
+
+
+def per_patient(store, patient_ids, window_s):
+    # The same statistics, but one query and one NumPy pass per patient
+    end = to_utc(None)
+    start = end - timedelta(seconds=window_s)
+    for patient_id in patient_ids:
+        readings = [r for b in store.buckets_for([patient_id], start, end) for r in b['readings'] if start <= r['ts'] <= end]
+        values = np.array([[r.get(f, np.nan) for f in NUMERIC_FIELDS] for r in readings], dtype=np.float64).reshape(-1, len(NUMERIC_FIELDS))
+        age_h = np.array([(end - r['ts']).total_seconds() / 3600.0 for r in readings])
+        cohort_stats(np.zeros(len(readings), dtype=np.int64), age_h, values, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-uri', default='mongomock://')
+    parser.add_argument('--patients', type=int, default=1000)
+    parser.add_argument('--readings', type=int, default=120, help='readings per patient')
+    parser.add_argument('--hours', type=float, default=2, help='span of the seeded readings')
+    parser.add_argument('--updated', type=int, default=10, help='patients with a new reading before the incremental run')
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--lookups', type=int, default=1000)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    check_out_of_range_label()
+    check_silent_patient_unknown()
+    db = get_db(args.mongo_uri)
+    store = VitalsStore(db)
+    store.ensure_indexes()
+    job = ForecastJob(db, store, chunk_size=args.chunk_size)
+    job.ensure_indexes()
+    seed(store, args.patients, args.readings, args.hours, datetime.now())
+    patient_ids = sorted(store.updated_patients())
+
+    results = {}
+    t0 = time.perf_counter()
+    per_patient(store, patient_ids, job.window_s)
+    results['per_patient_s'] = time.perf_counter() - t0
+    results['full_run'] = job.run(full=True)
+
+    # Only what is written after this run should be picked up next time
+    forecast.RUN_OVERLAP_S = 0
+    job.run()
+    for p in random.Random(1).sample(patient_ids, min(args.updated, len(patient_ids))):
+        store.append({"patientId": p, "timestamp": datetime.now().isoformat(), "heartRate": 150, "anomalyScore": 0.95})
+    results['incremental_run'] = job.run()
+
+    latencies = []
+    t0 = time.perf_counter()
+    for i in range(args.lookups):
+        t = time.perf_counter()
+        job.get(patient_ids[i % len(patient_ids)])
+        latencies.append(time.perf_counter() - t)
+    results['lookup'] = latency_summary(latencies, time.perf_counter() - t0)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"per patient      {results['per_patient_s']:8.2f} s for {len(patient_ids)} patients")
+    for name in ('full_run', 'incremental_run'):
+        r = results[name]
+        print(f"{name:<16} {r['seconds']:8.2f} s for {r['patients']} patients in {r['chunks']} chunks")
+    print(f"lookup           p50 {results['lookup']['p50_ms']:.3f} ms  p99 {results['lookup']['p99_ms']:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Concurrency stress check for post likes and comments.
+
+Many threads like one post in parallel, each user several times over, and
+comment on it. Afterwards likeCount must equal the number of distinct users
+and the comment count the number of comments sent. Run it against a real
+mongod: mongomock does not make find_one_and_update atomic across threads.
+
+    python benchmarks/bench_likes.py --mongo-uri mongodb://localhost:27017/ --users 200 --repeats 5
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+
+from _common import get_db
+from feed import PostFeed, like_key
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--repeats', type=int, default=5, help='likes sent per user')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    feed = PostFeed(get_db(args.mongo_uri)['posts'])
+    feed.ensure_indexes()
+    feed.posts.insert_one({"id": "stress", "author": "bench", "likes": {}, "likeCount": 0, "comments": [],
+                           "timestamp": "2026-01-01T00:00:00", "sharedTo": ["Global"]})
+
+    # Usernames with dots exercise like_key escaping too.
+    work = [f"Dr. User{u}" for u in range(args.users)] * args.repeats
+    counted = []
+    lock = threading.Lock()
+
+    def worker(offset):
+        local = 0
+        for user in work[offset::args.threads]:
+            if feed.like("stress", user) is not None:
+                local += 1
+            feed.comment("stress", f"{user}: hi")
+        with lock:
+            counted.append(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    post = feed.posts.find_one({"id": "stress"})
+    results = {
+        'operations': len(work) * 2,
+        'ops_per_s': len(work) * 2 / elapsed,
+        'likeCount': post['likeCount'],
+        'likedUsers': sum(1 for v in post['likes'].values() if v),
+        'likesAccepted': sum(counted),
+        'comments': len(post['comments']),
+        'expectedLikes': args.users,
+        'expectedComments': len(work),
+    }
+    ok = (results['likeCount'] == results['likedUsers'] == results['likesAccepted'] == args.users
+          and results['comments'] == len(work)
+          and like_key("Dr. User0") in post['likes'])
+    results['ok'] = ok
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{results['operations']} operations at {results['ops_per_s']:.0f} ops/s")
+        print(f"likeCount {results['likeCount']}  liked users {results['likedUsers']}  accepted {results['likesAccepted']}  expected {args.users}")
+        print(f"comments {results['comments']}  expected {len(work)}")
+        print('OK' if ok else 'MISMATCH')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Reconnect storm: many Socket.IO clients connecting at once, read cache off vs on.
+
+Each connect makes the server send initialData: the first page of both
+community feeds plus the recent chat of each channel. Clients connect through
+Flask-SocketIO's in-process test client from a pool of threads. The run
+reports connects/s, connect latency, and how many database commands the
+storm issued (see CommandCounter in _common.py). --mongo-uri points at a real mongod (the healthsync_db database
+is seeded and used there, as the server would).
+
+    python benchmarks/bench_reconnect.py --clients 1000 --threads 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _common import CommandCounter, latency_summary
+
+
+def storm(model, clients, threads):
+    def connect(_):
+        t0 = time.perf_counter()
+        client = model.socketio.test_client(model.app)
+        latency = time.perf_counter() - t0
+        assert any(m['name'] == 'initialData' for m in client.get_received())
+        return client, latency
+
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(threads) as pool:
+        t0 = time.perf_counter()
+        results = list(pool.map(connect, range(clients)))
+        elapsed = time.perf_counter() - t0
+    for client, _ in results:
+        client.disconnect()
+    return latency_summary([latency for _, latency in results], elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-uri', default='mongomock://')
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=50)
+    parser.add_argument('--posts', type=int, default=500, help='posts to seed per community')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    os.environ['MONGO_URI'] = args.mongo_uri
+    os.environ.setdefault('CORS_ORIGINS', '*')
+    # Before the server's client is created, so it is counted too
+    commands = CommandCounter(args.mongo_uri)
+    import model
+
+    model.posts_collection.insert_many([
+        {"id": f"bench{c}{i}", "author": "bench", "content": "x" * 200, "imageUrl": "", "likes": {}, "likeCount": 0,
+         "comments": ["nice"] * 3, "timestamp": f"2026-01-01T00:00:{i:06d}", "sharedTo": [c]}
+        for c in ("Global", "Local_India") for i in range(args.posts)
+    ])
+
+    results = {}
+    for mode in ('off', 'on'):
+        model.read_cache.enabled = mode == 'on'
+        model.read_cache.invalidate(*model.CACHE_GROUPS)
+        before = commands.count
+        result = storm(model, args.clients, args.threads)
+        result['db_commands'] = commands.count - before
+        results[mode] = result
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for mode, r in results.items():
+        print(f"cache {mode:<3} {r['throughput_rps']:8.1f} connects/s  p50 {r['p50_ms']:7.2f} ms  "
+              f"p99 {r['p99_ms']:7.2f} ms  {r['db_commands']:6d} db commands")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Connected clients and delivered events/s at 1, 2, 4 and 8 Socket.IO workers.
+
+For each worker count, serve.py starts that many workers plus one producer.
+Client processes then open --clients Socket.IO connections spread
+round-robin over the worker ports, and each client subscribes to every
+patient. The producer emits --patients readings every --interval seconds,
+so each client should receive patients / interval events per second.
+Without --message-queue a filesystem queue in a temp dir stands in for
+Redis.
+
+    python benchmarks/bench_scaling.py --clients 400 --patients 50 --interval 0.5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import BACKEND_DIR
+
+
+def wait_for_port(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f'worker on port {port} did not start')
+
+
+def client_process(ports, count, offset, duration, results):
+    import socketio
+
+    received = [0]
+    clients = []
+    for i in range(count):
+        client = socketio.Client()
+        client.on('vitalsUpdate', lambda data: received.__setitem__(0, received[0] + 1))
+        try:
+            client.connect(f'http://127.0.0.1:{ports[(offset + i) % len(ports)]}', transports=['websocket'])
+            client.call('subscribe', {'patients': '*'}, timeout=10)
+            clients.append(client)
+        except Exception:
+            pass
+    start = received[0]
+    time.sleep(duration)
+    results.put({'connected': len(clients), 'received': received[0] - start})
+    for client in clients:
+        client.disconnect()
+
+
+def run(workers, args, queue_url):
+    base_port = args.base_port
+    env = {**os.environ, 'MONGO_URI': args.mongo_uri, 'CORS_ORIGINS': '*',
+           'SIMULATED_PATIENTS': str(args.patients), 'SIMULATION_INTERVAL_S': str(args.interval)}
+    server = subprocess.Popen([sys.executable, 'serve.py', '--workers', str(workers), '--base-port', str(base_port),
+                               '--message-queue', queue_url],
+                              cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        ports = [base_port + i for i in range(workers)]
+        for port in ports:
+            wait_for_port(port)
+
+        results = multiprocessing.Queue()
+        per_process = -(-args.clients // args.client_processes)
+        procs = []
+        for p in range(args.client_processes):
+            count = min(per_process, args.clients - p * per_process)
+            if count > 0:
+                procs.append(multiprocessing.Process(target=client_process,
+                                                     args=(ports, count, p * per_process, args.duration, results)))
+        for proc in procs:
+            proc.start()
+        collected = [results.get(timeout=args.duration + 300) for _ in procs]
+        for proc in procs:
+            proc.join()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    connected = sum(r['connected'] for r in collected)
+    received = sum(r['received'] for r in collected)
+    return {
+        'workers': workers,
+        'connected_clients': connected,
+        'events_per_s': received / args.duration,
+        'expected_events_per_s': connected * args.patients / args.interval,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--clients', type=int, default=400)
+    parser.add_argument('--client-processes', type=int, default=4)
+    parser.add_argument('--patients', type=int, default=50)
+    parser.add_argument('--interval', type=float, default=0.5, help='seconds between simulator ticks')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--base-port', type=int, default=5301)
+    parser.add_argument('--message-queue', help='defaults to a filesystem queue in a temp dir')
+    parser.add_argument('--mongo-uri', default='mongomock://')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            results.append(run(workers, args, args.message_queue or f'filesystem://{tmp}'))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"{r['workers']} workers  {r['connected_clients']:>5} clients  "
+              f"{r['events_per_s']:10.0f} events/s delivered (expected {r['expected_events_per_s']:.0f})")
+
+
+if __name__ == '__main__':
+    main()
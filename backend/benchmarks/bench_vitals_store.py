@@ -0,0 +1,100 @@
+"""Write and read throughput of the bucketed vitals store.
+
+Writes --readings readings spread over --patients patients at one reading
+per patient every 3 s of simulated time, then times range queries, limited
+"latest N" queries, downsampled reads, and the newest reading of every
+patient (the patient list).
+
+    python benchmarks/bench_vitals_store.py --mongo-uri mongodb://localhost:27017/ --readings 1000000
+    python benchmarks/bench_vitals_store.py --mongo-uri mongomock:// --readings 20000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from _common import get_db, latency_summary
+from vitals_store import VitalsStore
+
+
+def generate(readings, patients, start):
+    rng = np.random.default_rng(0)
+    heart_rates = rng.integers(60, 150, readings)
+    spo2 = rng.integers(85, 100, readings)
+    scores = rng.random(readings)
+    for i in range(readings):
+        yield {
+            "patientId": f"patient{i % patients}",
+            "heartRate": int(heart_rates[i]),
+            "spO2": int(spo2[i]),
+            "anomalyScore": float(scores[i]),
+            "timestamp": (start + timedelta(seconds=3 * (i // patients))).isoformat(),
+        }
+
+
+def time_reads(fn, repeats):
+    latencies = []
+    t0 = time.perf_counter()
+    for i in range(repeats):
+        t = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - t)
+    return latency_summary(latencies, time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/')
+    parser.add_argument('--readings', type=int, default=1000000)
+    parser.add_argument('--patients', type=int, default=100)
+    parser.add_argument('--batch', type=int, default=1000, help='readings per bulk write')
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    store = VitalsStore(get_db(args.mongo_uri))
+    store.ensure_indexes()
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    t0 = time.perf_counter()
+    batch = []
+    for reading in generate(args.readings, args.patients, start):
+        batch.append(reading)
+        if len(batch) == args.batch:
+            store.append_many(batch)
+            batch = []
+    store.append_many(batch)
+    write_s = time.perf_counter() - t0
+
+    span_s = 3 * args.readings // args.patients
+    rng = np.random.default_rng(1)
+
+    def range_query(i):
+        offset = int(rng.integers(0, max(span_s - 3600, 1)))
+        store.query(f"patient{i % args.patients}", start + timedelta(seconds=offset), start + timedelta(seconds=offset + 3600))
+
+    results = {
+        'readings': args.readings,
+        'patients': args.patients,
+        'buckets': store.buckets.count_documents({}),
+        'write': {'seconds': write_s, 'readings_per_s': args.readings / write_s},
+        'read_latest_100': time_reads(lambda i: store.query(f"patient{i % args.patients}", limit=100), args.queries),
+        'read_range_1h': time_reads(range_query, args.queries),
+        'read_downsample_1h_full': time_reads(lambda i: store.downsample(f"patient{i % args.patients}", 3600), args.queries),
+        'read_latest_all_patients': time_reads(lambda i: store.latest_many([f"patient{p}" for p in range(args.patients)]),
+                                               max(args.queries // 10, 1)),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"wrote {args.readings} readings into {results['buckets']} buckets: {results['write']['readings_per_s']:.0f} readings/s")
+    for name in ('read_latest_100', 'read_range_1h', 'read_downsample_1h_full', 'read_latest_all_patients'):
+        r = results[name]
+        print(f"{name:<24} p50 {r['p50_ms']:8.2f} ms  p99 {r['p99_ms']:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
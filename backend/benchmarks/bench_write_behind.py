@@ -0,0 +1,75 @@
+"""Sustained vitals ingest: one write per event vs. the write-behind buffer.
+
+Each mode writes --events readings through the vitals store and reports
+events per second until everything is durable (the buffer is closed, i.e.
+fully flushed, before the clock stops).
+
+    python benchmarks/bench_write_behind.py --mongo-uri mongodb://localhost:27017/ --events 50000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from _common import get_db
+from vitals_store import VitalsStore
+from write_buffer import WriteBehindBuffer
+
+
+def events(n, patients):
+    start = datetime(2026, 1, 1)
+    for i in range(n):
+        yield {
+            "patientId": f"patient{i % patients}",
+            "heartRate": 70 + i % 30,
+            "spO2": 95 + i % 5,
+            "anomalyScore": (i % 80) / 100,
+            "timestamp": (start + timedelta(seconds=3 * (i // patients))).isoformat(),
+        }
+
+
+def per_event(store, n, patients):
+    t0 = time.perf_counter()
+    for event in events(n, patients):
+        store.append(event)
+    return {'seconds': time.perf_counter() - t0}
+
+
+def write_behind(store, n, patients, max_batch, max_delay_s):
+    buffer = WriteBehindBuffer(store.append_many, max_batch=max_batch, max_delay_s=max_delay_s, max_pending=n)
+    t0 = time.perf_counter()
+    for event in events(n, patients):
+        buffer.put(event)
+    buffer.close()
+    return {'seconds': time.perf_counter() - t0, **buffer.stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/')
+    parser.add_argument('--events', type=int, default=50000)
+    parser.add_argument('--patients', type=int, default=100)
+    parser.add_argument('--max-batch', type=int, default=500)
+    parser.add_argument('--max-delay-ms', type=float, default=500)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = {
+        'per_event': per_event(VitalsStore(get_db(args.mongo_uri)), args.events, args.patients),
+        'write_behind': write_behind(VitalsStore(get_db(args.mongo_uri)), args.events, args.patients,
+                                     args.max_batch, args.max_delay_ms / 1000.0),
+    }
+    for r in results.values():
+        r['events_per_s'] = args.events / r['seconds']
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, r in results.items():
+        print(f"{name:<13} {r['events_per_s']:10.0f} events/s")
+    wb = results['write_behind']
+    print(f"write-behind: {wb['flushes']} flushes, avg {wb['avgFlushMs']:.1f} ms, max {wb['maxFlushMs']:.1f} ms, dropped {wb['dropped']}")
+
+
+if __name__ == '__main__':
+    main()
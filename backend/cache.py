@@ -0,0 +1,151 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_etag(value):
+    raw = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str).encode()
+    return hashlib.sha1(raw).hexdigest()
+
+
+class _LocalGenerations:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generations = {}
+
+    def get(self, group):
+        return self._generations.get(group, 0)
+
+    def bump(self, group):
+        with self._lock:
+            self._generations[group] = self._generations.get(group, 0) + 1
+
+
+class _RedisStore:
+    """Generations and values kept in Redis, shared by every server process."""
+
+    def __init__(self, url, prefix):
+        import redis
+        self.redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, group):
+        return int(self.redis.get(f'{self.prefix}gen:{group}') or 0)
+
+    def bump(self, group):
+        self.redis.incr(f'{self.prefix}gen:{group}')
+
+    def load(self, key):
+        raw = self.redis.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def store(self, key, entry, ttl_s):
+        self.redis.set(self.prefix + key, json.dumps(entry, default=str), px=int(ttl_s * 1000))
+
+
+class ReadCache:
+    """Read-through cache for rarely-changing query results.
+
+    Entries live in an in-process LRU for up to ttl_s. Each entry belongs to
+    a group such as 'doctors'. invalidate(group) bumps that group's
+    generation, and entries loaded under an older generation are never
+    served again. A load that races with a write is therefore dropped rather
+    than cached stale.
+
+    With shared_url (redis://...) the generations and values also live in
+    Redis. A write in one server process then invalidates the caches of all
+    of them, and a miss in one process can be served from another's load.
+
+    Concurrent misses for the same key wait for a single load instead of all
+    querying the database at once.
+    """
+
+    def __init__(self, ttl_s=30, max_entries=1024, shared_url=None, prefix='healthsync:cache:'):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.enabled = ttl_s > 0
+        self._shared = _RedisStore(shared_url, prefix) if shared_url else None
+        self._generations = self._shared or _LocalGenerations()
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, group, key, loader):
+        """Return (value, etag), calling loader() on a miss.
+
+        Cached values are shared between callers and must not be mutated.
+        """
+        if not self.enabled:
+            value = loader()
+            return value, make_etag(value)
+        full_key = f'{group}:{self._generations.get(group)}:{key}'
+        while True:
+            with self._lock:
+                entry = self._entries.get(full_key)
+                if entry is not None and entry[2] > time.monotonic():
+                    self._entries.move_to_end(full_key)
+                    self.hits += 1
+                    return entry[0], entry[1]
+                pending = self._loading.get(full_key)
+                if pending is None:
+                    pending = self._loading[full_key] = threading.Event()
+                    break
+            pending.wait()
+
+        try:
+            shared = self._shared.load(full_key) if self._shared else None
+            if shared is not None:
+                value, etag = shared
+                with self._lock:
+                    self.shared_hits += 1
+            else:
+                value = loader()
+                etag = make_etag(value)
+                if self._shared:
+                    self._shared.store(full_key, [value, etag], self.ttl_s)
+                with self._lock:
+                    self.misses += 1
+            with self._lock:
+                self._entries[full_key] = (value, etag, time.monotonic() + self.ttl_s)
+                self._entries.move_to_end(full_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            return value, etag
+        finally:
+            with self._lock:
+                self._loading.pop(full_key).set()
+
+    def invalidate(self, *groups):
+        for group in groups:
+            self._generations.bump(group)
+        with self._lock:
+            self.invalidations += len(groups)
+            # Entries of the old generation can't be hit any more; free them now
+            stale = [k for k in self._entries if k.split(':', 1)[0] in groups]
+            for k in stale:
+                del self._entries[k]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'shared': self._shared is not None,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'sharedHits': self.shared_hits,
+                'misses': self.misses,
+                'hitRatio': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'evictions': self.evictions,
+                'ttlS': self.ttl_s,
+                'maxEntries': self.max_entries,
+            }
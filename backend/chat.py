@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+DEFAULT_SYNC_LIMIT = 200
+MAX_SYNC_LIMIT = 1000
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _public(doc):
+    message = doc['message']
+    if not isinstance(message, dict):
+        message = {"content": message}
+    return {**message, "seq": doc['seq']}
+
+
+class ChatStore:
+    """Community chat history, one document per message.
+
+    Messages get a per-channel sequence number from a counter document, so a
+    reconnecting client can ask for everything after the last seq it saw
+    instead of the whole history. The newest tail_size messages of each
+    channel are also kept in memory. A sync that starts inside that tail
+    costs at most one counter lookup, which confirms that no other server
+    process has written since, and no message query. The counter value is
+    itself reused for seq_ttl_s, so a reconnect storm doesn't turn into one
+    lookup per channel per client; messages other processes wrote in that
+    time still reach clients live through the message queue.
+    """
+
+    def __init__(self, db, tail_size=50, retention_s=30 * 24 * 3600, max_per_channel=100000, seq_ttl_s=1.0):
+        self.messages = db['chat_messages']
+        self.counters = db['chat_counters']
+        self.tail_size = tail_size
+        self.retention_s = retention_s
+        self.max_per_channel = max_per_channel
+        self.seq_ttl_s = seq_ttl_s
+        self._tails = {}
+        self._seqs = {}  # (community, channel) -> (latest seq, monotonic time read)
+        self._lock = threading.Lock()
+
+    def ensure_indexes(self):
+        self.messages.create_index([("communityId", ASCENDING), ("channel", ASCENDING), ("seq", ASCENDING)], unique=True)
+        self.messages.create_index([("createdAt", ASCENDING)])
+
+    def _counter_id(self, community_id, channel):
+        return f"{community_id}:{channel}"
+
+    def latest_seq(self, community_id, channel):
+        counter = self.counters.find_one({"_id": self._counter_id(community_id, channel)})
+        return counter['seq'] if counter else 0
+
+    def _recent_seq(self, community_id, channel):
+        # latest_seq(), reused for seq_ttl_s; this process's own appends update it
+        key = (community_id, channel)
+        with self._lock:
+            cached = self._seqs.get(key)
+        if cached is not None and time.monotonic() - cached[1] < self.seq_ttl_s:
+            return cached[0]
+        seq = self.latest_seq(community_id, channel)
+        with self._lock:
+            self._seqs[key] = (seq, time.monotonic())
+        return seq
+
+    def append(self, community_id, channel, message, created_at=None):
+        """Store message and return it with its seq."""
+        counter = self.counters.find_one_and_update(
+            {"_id": self._counter_id(community_id, channel)},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        doc = {"communityId": community_id, "channel": channel, "seq": counter['seq'],
+               "message": message, "createdAt": created_at or _utcnow()}
+        self.messages.insert_one(doc)
+        public = _public(doc)
+        with self._lock:
+            cached = self._seqs.get((community_id, channel))
+            if cached is not None and cached[0] < public['seq']:
+                self._seqs[(community_id, channel)] = (public['seq'], cached[1])
+            tail = self._tails.get((community_id, channel))
+            # Only extend a tail that is contiguous; otherwise it is reloaded on the next read
+            if tail is not None and (not tail or tail[-1]['seq'] == public['seq'] - 1):
+                tail.append(public)
+            else:
+                self._tails.pop((community_id, channel), None)
+        return public
+
+    def append_many(self, community_id, channel, messages, created_at=None):
+        """Store messages in order with consecutive seqs; for imports and migrations."""
+        if not messages:
+            return
+        counter = self.counters.find_one_and_update(
+            {"_id": self._counter_id(community_id, channel)},
+            {"$inc": {"seq": len(messages)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        first = counter['seq'] - len(messages) + 1
+        created_at = created_at or _utcnow()
+        self.messages.insert_many([
+            {"communityId": community_id, "channel": channel, "seq": first + i, "message": message, "createdAt": created_at}
+            for i, message in enumerate(messages)
+        ])
+        with self._lock:
+            self._tails.pop((community_id, channel), None)
+            self._seqs.pop((community_id, channel), None)
+
+    def _tail(self, community_id, channel):
+        latest = self._recent_seq(community_id, channel)
+        with self._lock:
+            tail = self._tails.get((community_id, channel))
+        if tail is not None and (tail[-1]['seq'] if tail else 0) == latest:
+            return tail
+        docs = self.messages.find(
+            {"communityId": community_id, "channel": channel},
+            {"_id": 0},
+        ).sort("seq", DESCENDING).limit(self.tail_size)
+        tail = deque(reversed([_public(doc) for doc in docs]), maxlen=self.tail_size)
+        # A gap means a message whose seq was taken isn't inserted yet; don't keep that tail
+        if not tail or tail[-1]['seq'] - tail[0]['seq'] == len(tail) - 1:
+            with self._lock:
+                self._tails[(community_id, channel)] = tail
+        return tail
+
+    def since(self, community_id, channel, after_seq=None, limit=DEFAULT_SYNC_LIMIT):
+        """Messages with seq > after_seq, oldest first, at most the newest limit of them.
+
+        Without after_seq this is the channel's recent history. If more than
+        limit messages are newer than after_seq the result starts later than
+        after_seq + 1, and the client should replace what it has.
+        """
+        limit = max(1, min(limit, MAX_SYNC_LIMIT))
+        after_seq = int(after_seq or 0)
+        tail = list(self._tail(community_id, channel))
+        newer = [m for m in tail if m['seq'] > after_seq]
+        if not tail or tail[0]['seq'] <= after_seq + 1 or len(newer) >= limit:
+            return newer[-limit:]
+        docs = self.messages.find(
+            {"communityId": community_id, "channel": channel, "seq": {"$gt": after_seq}},
+            {"_id": 0},
+        ).sort("seq", DESCENDING).limit(limit)
+        return list(reversed([_public(doc) for doc in docs]))
+
+    def compact(self, now=None):
+        """Drop messages past the retention window and beyond max_per_channel per channel."""
+        now = now or _utcnow()
+        deleted = self.messages.delete_many({"createdAt": {"$lt": now - timedelta(seconds=self.retention_s)}}).deleted_count
+        for counter in self.counters.find({"seq": {"$gt": self.max_per_channel}}):
+            community_id, channel = counter['_id'].rsplit(':', 1)
+            deleted += self.messages.delete_many({
+                "communityId": community_id, "channel": channel,
+                "seq": {"$lte": counter['seq'] - self.max_per_channel},
+            }).deleted_count
+        return deleted
@@ -0,0 +1,102 @@
+import base64
+import json
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(post):
+    raw = json.dumps([post['timestamp'], post['id']]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        timestamp, post_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    return timestamp, post_id
+
+
+def like_key(user):
+    # Usernames such as "Dr. Kumar" can't be used verbatim in a "likes.<user>"
+    # field path; swap the reserved characters for full-width look-alikes.
+    return user.replace('$', '\uff04').replace('.', '\uff0e')
+
+
+class PostFeed:
+    """Newest-first community feed over the posts collection, paged by (timestamp, id).
+
+    The posts collection is the only copy of a post; a community's feed is
+    every post whose sharedTo contains it. Keyset pagination keeps each page
+    an index range scan however deep the client scrolls.
+    """
+
+    def __init__(self, posts):
+        self.posts = posts
+
+    def ensure_indexes(self):
+        self.posts.create_index([("sharedTo", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)])
+        self.posts.create_index([("id", ASCENDING)], unique=True)
+
+    def page(self, community_id, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """Return (posts, next_cursor); next_cursor is None on the last page."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = {"sharedTo": community_id}
+        if cursor:
+            timestamp, post_id = decode_cursor(cursor)
+            query["$or"] = [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "id": {"$lt": post_id}},
+            ]
+        posts = list(self.posts.find(query, {"_id": 0})
+                     .sort([("timestamp", DESCENDING), ("id", DESCENDING)])
+                     .limit(limit + 1))
+        next_cursor = encode_cursor(posts[limit - 1]) if len(posts) > limit else None
+        return posts[:limit], next_cursor
+
+    def like(self, post_id, user):
+        """Record user's like; returns (like count, sharedTo), or None if it was already counted.
+
+        The filter only matches while the user hasn't liked the post, so the
+        flag and likeCount change together in one atomic update. The count is
+        taken from the pre-update document, which is exactly one lower.
+        """
+        field = "likes." + like_key(user)
+        post = self.posts.find_one_and_update(
+            {"id": post_id, field: {"$ne": True}},
+            {"$set": {field: True}, "$inc": {"likeCount": 1}},
+            projection={"_id": 0, "likeCount": 1, "sharedTo": 1},
+            return_document=ReturnDocument.BEFORE,
+        )
+        return (post.get('likeCount', 0) + 1, post.get('sharedTo', [])) if post else None
+
+    def comment(self, post_id, comment):
+        """Append a comment; returns (like count, sharedTo), or None if the post doesn't exist."""
+        post = self.posts.find_one_and_update(
+            {"id": post_id},
+            {"$push": {"comments": comment}},
+            projection={"_id": 0, "likeCount": 1, "sharedTo": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        return (post.get('likeCount', 0), post.get('sharedTo', [])) if post else None
+
+    def backfill_like_counts(self):
+        # Likes recorded before like_key() used the raw username, which the
+        # "likes.<key>" filter in like() can't see; move them to the escaped
+        # key and recount, so an earlier like isn't counted a second time.
+        for post in self.posts.find({"likes": {"$exists": True}}, {"likes": 1}):
+            likes = post.get('likes') or {}
+            if all(like_key(user) == user for user in likes):
+                continue
+            escaped = {}
+            for user, liked in likes.items():
+                escaped[like_key(user)] = bool(escaped.get(like_key(user))) or bool(liked)
+            count = sum(1 for liked in escaped.values() if liked)
+            self.posts.update_one({"_id": post['_id']}, {"$set": {"likes": escaped, "likeCount": count}})
+        # Posts created before likeCount existed get it computed once
+        for post in self.posts.find({"likeCount": {"$exists": False}}, {"likes": 1}):
+            count = sum(1 for liked in post.get('likes', {}).values() if liked)
+            self.posts.update_one({"_id": post['_id']}, {"$set": {"likeCount": count}})
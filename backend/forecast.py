@@ -0,0 +1,244 @@
+import time
+from datetime import timedelta
+
+import numpy as np
+from pymongo import ASCENDING, UpdateOne
+
+from vitals_store import NUMERIC_FIELDS, to_utc
+
+VITAL_FIELDS = ['heartRate', 'spO2', 'respirationRate', 'temperature']
+NORMAL_RANGES = {
+    'heartRate': (50.0, 110.0),
+    'spO2': (94.0, 100.0),
+    'respirationRate': (10.0, 24.0),
+    'temperature': (35.5, 38.0),
+}
+SUGGESTIONS = {
+    'Unknown': "No recent vitals; check the patient's wearable",
+    'Low': "Maintain health",
+    'Moderate': "Review recent vitals and consider a follow-up",
+    'High': "Contact the patient and schedule an urgent review",
+}
+# Written forecasts cover readings up to the run start; the next run looks
+# back this far before it so writes that were in flight aren't missed.
+RUN_OVERLAP_S = 60
+
+
+def _flatten(buckets, patient_index, start, end):
+    """Readings of a chunk of patients as (patient idx, age in hours, values[n, fields]) arrays."""
+    idx, ts, rows = [], [], []
+    for bucket in buckets:
+        i = patient_index[bucket['patientId']]
+        for r in bucket['readings']:
+            if start <= r['ts'] <= end:
+                idx.append(i)
+                ts.append(r['ts'])
+                rows.append([r.get(f) for f in NUMERIC_FIELDS])
+    try:
+        values = np.array(rows, dtype=np.float64).reshape(len(rows), len(NUMERIC_FIELDS))
+    except (TypeError, ValueError):
+        values = np.array([[_as_float(v) for v in row] for row in rows], dtype=np.float64).reshape(len(rows), len(NUMERIC_FIELDS))
+    end_us = np.datetime64(end, 'us')
+    age_h = (end_us - np.array(ts, dtype='datetime64[us]')).astype(np.float64) / 3.6e9
+    return np.array(idx, dtype=np.int64), age_h, values
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def cohort_stats(idx, age_h, values, n_patients, recent_h=1.0):
+    """Per-patient rolling statistics for all patients of a chunk at once.
+
+    idx gives each reading's patient, age_h its age in hours, and values
+    holds one column per NUMERIC_FIELDS entry (NaN where missing). Every
+    result is an (n_patients, fields) array, or (n_patients,) for the
+    anomaly summaries.
+    """
+    fields = values.shape[1]
+    valid = ~np.isnan(values)
+    v = np.where(valid, values, 0.0)
+
+    def group_sum(weights):
+        return np.stack([np.bincount(idx, weights=weights[:, f], minlength=n_patients) for f in range(fields)], axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n = group_sum(valid.astype(np.float64))
+        s = group_sum(v)
+        mean = s / n
+        std = np.sqrt(np.maximum(group_sum(v * v) / n - mean ** 2, 0.0))
+
+        # Least-squares slope against time, in units per hour
+        x = np.where(valid, -age_h[:, None], 0.0)
+        sx, sxx, sxy = group_sum(x), group_sum(x * x), group_sum(x * v)
+        denom = n * sxx - sx ** 2
+        trend = np.where(denom > 1e-9, (n * sxy - sx * s) / np.where(denom > 1e-9, denom, 1.0), 0.0)
+
+        low = np.array([NORMAL_RANGES.get(f, (-np.inf, np.inf))[0] for f in NUMERIC_FIELDS])
+        high = np.array([NORMAL_RANGES.get(f, (-np.inf, np.inf))[1] for f in NUMERIC_FIELDS])
+        outside = valid & ((values < low) | (values > high))
+        out_of_range = group_sum(outside.astype(np.float64)) / n
+
+        a = NUMERIC_FIELDS.index('anomalyScore')
+        recent = valid[:, a] & (age_h <= recent_h)
+        recent_n = np.bincount(idx, weights=recent, minlength=n_patients)
+        recent_anomaly = np.bincount(idx, weights=np.where(recent, v[:, a], 0.0), minlength=n_patients) / recent_n
+
+    minimum = np.full((n_patients, fields), np.nan)
+    maximum = np.full((n_patients, fields), np.nan)
+    last = np.full((n_patients, fields), np.nan)
+    if idx.size:
+        # Group by patient, oldest reading first within each patient
+        order = np.lexsort((-age_h, idx))
+        present, starts = np.unique(idx[order], return_index=True)
+        masked = np.where(valid, values, np.nan)[order]
+        minimum[present] = np.fmin.reduceat(masked, starts, axis=0)
+        maximum[present] = np.fmax.reduceat(masked, starts, axis=0)
+        positions = np.where(valid[order], np.arange(idx.size)[:, None], -1)
+        last_pos = np.maximum.reduceat(positions, starts, axis=0)
+        last[present] = np.where(last_pos >= 0, masked[np.maximum(last_pos, 0), np.arange(fields)], np.nan)
+
+    return {
+        'count': n, 'mean': mean, 'std': std, 'min': minimum, 'max': maximum, 'last': last,
+        'trend': trend, 'outOfRange': out_of_range, 'recentAnomaly': recent_anomaly,
+    }
+
+
+def risk_scores(stats, over_threshold):
+    """Combine cohort_stats and the share of anomaly scores over the threshold into a 0..1 risk per patient."""
+    a = NUMERIC_FIELDS.index('anomalyScore')
+    vitals = [NUMERIC_FIELDS.index(f) for f in VITAL_FIELDS]
+    hr, spo2 = NUMERIC_FIELDS.index('heartRate'), NUMERIC_FIELDS.index('spO2')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        anomaly = np.where(np.isnan(stats['recentAnomaly']), stats['mean'][:, a], stats['recentAnomaly'])
+        vital_n = stats['count'][:, vitals].sum(axis=1)
+        # Fields without readings have a NaN share; they must not blank out the others
+        out_of_range = np.nansum(stats['outOfRange'][:, vitals] * stats['count'][:, vitals], axis=1) / vital_n
+        # Rising heart rate (5 bpm/h saturates) or falling SpO2 (1 %/h saturates)
+        trend = np.clip(np.maximum(stats['trend'][:, hr], 0) / 5.0 + np.maximum(-stats['trend'][:, spo2], 0) / 1.0, 0, 1)
+    # Vitals out of range on every reading are enough for Moderate on their own
+    risk = (0.4 * np.nan_to_num(anomaly) + 0.2 * np.nan_to_num(over_threshold)
+            + 0.3 * np.nan_to_num(out_of_range) + 0.1 * np.nan_to_num(trend))
+    return np.clip(risk, 0.0, 1.0)
+
+
+def risk_label(value, readings):
+    if readings == 0:
+        return 'Unknown'
+    if value >= 0.6:
+        return 'High'
+    if value >= 0.3:
+        return 'Moderate'
+    return 'Low'
+
+
+def _number(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+class ForecastJob:
+    """Periodic risk forecasts for the whole patient cohort.
+
+    Each run scores patients whose vitals buckets were written since the
+    previous run, plus stale forecasts: those whose newest reading has left
+    the window (they become Unknown) or that are older than the window
+    themselves. Patients are processed chunk_size at a time. Each
+    chunk costs one bucket query, and its statistics are computed for
+    every patient at once with NumPy. Results are upserted into the
+    forecasts collection, one document per patient, so serving a forecast
+    is a single indexed lookup.
+    """
+
+    def __init__(self, db, vitals_store, window_s=24 * 3600, recent_s=3600, chunk_size=500, threshold=0.7, horizon_days=30):
+        self.forecasts = db['forecasts']
+        self.jobs = db['forecast_jobs']
+        self.vitals_store = vitals_store
+        self.window_s = window_s
+        self.recent_s = recent_s
+        self.chunk_size = chunk_size
+        self.threshold = threshold
+        self.horizon_days = horizon_days
+
+    def ensure_indexes(self):
+        self.forecasts.create_index([("patientId", ASCENDING)], unique=True)
+        self.forecasts.create_index([("computedAt", ASCENDING)])
+        self.forecasts.create_index([("lastReadingAt", ASCENDING)])
+
+    def get(self, patient_id):
+        forecast = self.forecasts.find_one({"patientId": patient_id}, {"_id": 0})
+        if forecast is None:
+            return None
+        forecast['computedAt'] = forecast['computedAt'].isoformat()
+        if forecast.get('lastReadingAt') is not None:
+            forecast['lastReadingAt'] = forecast['lastReadingAt'].isoformat()
+        forecast['window'] = {k: v.isoformat() if hasattr(v, 'isoformat') else v for k, v in forecast['window'].items()}
+        return forecast
+
+    def delete(self, patient_id):
+        self.forecasts.delete_one({"patientId": patient_id})
+
+    def stale_patients(self, now):
+        """Patients whose forecast no longer describes the current window."""
+        cutoff = now - timedelta(seconds=self.window_s)
+        return self.forecasts.distinct("patientId", {"$or": [
+            {"computedAt": {"$lt": cutoff}},
+            {"lastReadingAt": {"$lt": cutoff}, "riskScore": {"$ne": "Unknown"}},
+        ]})
+
+    def run(self, now=None, full=False):
+        """Score patients with new readings and stale forecasts (every patient if full); returns run stats."""
+        t0 = time.perf_counter()
+        now = to_utc(now)
+        state = self.jobs.find_one({"_id": "cohort"})
+        since = None if full or state is None else state['lastRunAt']
+        patient_ids = set(self.vitals_store.updated_patients(since))
+        if since is not None:
+            patient_ids.update(self.stale_patients(now))
+        patient_ids = sorted(patient_ids)
+        chunks = 0
+        for i in range(0, len(patient_ids), self.chunk_size):
+            self._score_chunk(patient_ids[i:i + self.chunk_size], now)
+            chunks += 1
+        self.jobs.update_one({"_id": "cohort"}, {"$set": {"lastRunAt": now - timedelta(seconds=RUN_OVERLAP_S)}}, upsert=True)
+        return {'patients': len(patient_ids), 'chunks': chunks, 'seconds': time.perf_counter() - t0}
+
+    def _score_chunk(self, patient_ids, now):
+        start = now - timedelta(seconds=self.window_s)
+        patient_index = {patient_id: i for i, patient_id in enumerate(patient_ids)}
+        idx, age_h, values = _flatten(self.vitals_store.buckets_for(patient_ids, start, now), patient_index, start, now)
+        stats = cohort_stats(idx, age_h, values, len(patient_ids), self.recent_s / 3600.0)
+
+        a = NUMERIC_FIELDS.index('anomalyScore')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            over = np.bincount(idx, weights=np.nan_to_num(values[:, a]) > self.threshold, minlength=len(patient_ids))
+            over_threshold = over / stats['count'][:, a]
+        risk = risk_scores(stats, over_threshold)
+        readings = np.bincount(idx, minlength=len(patient_ids))
+        newest_age_h = np.full(len(patient_ids), np.inf)
+        np.minimum.at(newest_age_h, idx, age_h)
+
+        ops = []
+        for i, patient_id in enumerate(patient_ids):
+            label = risk_label(risk[i], readings[i])
+            ops.append(UpdateOne({"patientId": patient_id}, {"$set": {
+                "riskScore": label,
+                "riskValue": round(float(risk[i]), 4),
+                "suggestion": SUGGESTIONS[label],
+                "days": self.horizon_days,
+                "computedAt": now,
+                "lastReadingAt": now - timedelta(hours=float(newest_age_h[i])) if readings[i] else None,
+                "window": {"from": start, "to": now, "readings": int(readings[i])},
+                "vitals": {
+                    field: {key: _number(stats[key][i, f]) for key in ('mean', 'std', 'min', 'max', 'last', 'trend', 'outOfRange')}
+                    for f, field in enumerate(NUMERIC_FIELDS)
+                },
+                "anomaly": {
+                    "recentMean": _number(stats['recentAnomaly'][i]),
+                    "overThreshold": _number(over_threshold[i]),
+                },
+            }}, upsert=True))
+        if ops:
+            self.forecasts.bulk_write(ops, ordered=False)
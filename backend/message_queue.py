@@ -0,0 +1,34 @@
+import os
+from urllib.parse import urlparse
+
+
+def socketio_options(url, write_only=False):
+    """SocketIO() keyword arguments for sharing events between server processes.
+
+    redis://, amqp:// and the other URLs Flask-SocketIO understands are passed
+    through as message_queue. filesystem:///some/dir uses kombu's filesystem
+    transport in that directory: no broker to run, so it works as a local
+    stand-in for Redis in benchmarks and tests on a single machine.
+    """
+    if not url:
+        return {}
+    if not url.startswith('filesystem://'):
+        return {'message_queue': url}
+
+    import socketio
+
+    folder = urlparse(url).path or os.path.join(os.getcwd(), '.socketio-queue')
+    os.makedirs(folder, exist_ok=True)
+    manager = socketio.KombuManager(
+        'filesystem://',
+        channel='flask-socketio',
+        write_only=write_only,
+        connection_options={'transport_options': {
+            'data_folder_in': folder,
+            'data_folder_out': folder,
+            'control_folder': folder,
+            'polling_interval': 0.01,
+        }},
+    )
+    # message_queue is still passed so SocketIO() without an app sets itself up as an emitter
+    return {'message_queue': url, 'client_manager': manager}
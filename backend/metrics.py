@@ -0,0 +1,237 @@
+# The backend's copy of the metrics module; ai/metrics.py has the same types,
+# profiler and request hooks, without the pymongo command listener.
+import bisect
+import sys
+import threading
+import time
+import traceback
+from collections import Counter as _Tally
+
+from flask import Response, g, jsonify, request
+from pymongo import monitoring
+
+# Seconds; roughly x2.5 steps from 0.5 ms to 10 s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.labelnames, labels)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, [("le", "+Inf")])} {series[-1]}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {series[-2]}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}')
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Gauge:
+    """A value read from fn() at scrape time; fn may return a number or {label values tuple: number}."""
+
+    type = 'gauge'
+
+    def __init__(self, name, help, fn, labelnames=()):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        value = self.fn()
+        if isinstance(value, dict):
+            for labels, v in sorted(value.items()):
+                lines.append(f'{self.name}{_labels(self.labelnames, labels)} {v}')
+        else:
+            lines.append(f'{self.name} {value}')
+        return lines
+
+
+class CounterFunc(Gauge):
+    """A counter kept elsewhere (e.g. a component's own stats) and read from fn() at scrape time."""
+
+    type = 'counter'
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, fn, labelnames=()):
+        return self._add(Gauge(name, help, fn, labelnames))
+
+    def counter_func(self, name, help, fn, labelnames=()):
+        return self._add(CounterFunc(name, help, fn, labelnames))
+
+    def render(self):
+        """Everything in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                # A failing gauge callback shouldn't take the whole scrape down
+                continue
+        return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def sample_stacks(seconds, interval_s=0.005):
+    """Sample every thread's stack for `seconds` and return folded stacks.
+
+    Each output line is "thread;outer_frame;...;inner_frame count", the
+    input format of flamegraph.pl and speedscope. The sampling thread
+    itself is left out.
+    """
+    own = threading.get_ident()
+    names = {}
+    tally = _Tally()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if len(names) != threading.active_count():
+            names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = [f'{f.name} ({f.filename.rsplit("/", 1)[-1]}:{f.lineno})'
+                     for f in traceback.extract_stack(frame)]
+            tally[';'.join([names.get(ident, str(ident))] + stack)] += 1
+        time.sleep(interval_s)
+    return ''.join(f'{stack} {count}\n' for stack, count in tally.most_common())
+
+
+def instrument_app(app, registry, profiling_enabled=False):
+    """Time every request of a Flask app and serve /metrics and /debug/profile.
+
+    Returns the http_request_duration_seconds histogram. /debug/profile
+    answers 404 unless profiling_enabled.
+    """
+    http_request_seconds = registry.histogram('http_request_duration_seconds', 'HTTP request latency', ['method', 'route', 'status'])
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        if 'request_start' in g:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            http_request_seconds.observe(time.perf_counter() - g.request_start, request.method, route, str(response.status_code))
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    @app.route('/debug/profile', methods=['GET'])
+    def get_profile():
+        # Folded stacks of every thread, sampled for ?seconds= (max 60); feed
+        # the output to flamegraph.pl or speedscope
+        if not profiling_enabled:
+            return jsonify({'error': 'Profiling is disabled; set PROFILING_ENABLED=1'}), 404
+        seconds = min(request.args.get('seconds', 10, type=float), 60)
+        interval_s = request.args.get('interval_ms', 5, type=float) / 1000.0
+        return Response(sample_stacks(seconds, interval_s), content_type='text/plain; charset=utf-8')
+
+    return http_request_seconds
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """pymongo command listener recording each command's duration and failures."""
+
+    def __init__(self, duration, failures):
+        self.duration = duration
+        self.failures = failures
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.duration.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        self.duration.observe(event.duration_micros / 1e6, event.command_name)
+        self.failures.inc(event.command_name)
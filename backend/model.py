@@ -1,24 +1,134 @@
 from flask import Flask, request, jsonify
-from flask_socketio import SocketIO, emit
+from flask.json.provider import DefaultJSONProvider
+from flask_socketio import SocketIO, emit, join_room, leave_room, close_room
 from pymongo import MongoClient
+import atexit
 import json
+import os
 import random
+import signal
+import sys
 from datetime import datetime, timedelta
 import time
 from functools import wraps
 
+import message_queue
+import metrics
+from cache import ReadCache
+from chat import ChatStore, DEFAULT_SYNC_LIMIT
+from feed import PostFeed, DEFAULT_PAGE_SIZE, like_key
+from forecast import ForecastJob
+from rooms import (CHANNELS, channel_room, community_rooms, patient_room, patient_rooms,
+                   rooms_from_subscription, user_room)
+from vitals_store import VitalsStore, check_reading
+from write_buffer import WriteBehindBuffer
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'secret!'
+
+# Prometheus metrics, served at /metrics
+metrics_registry = metrics.Registry()
+socketio_event_seconds = metrics_registry.histogram('socketio_event_duration_seconds', 'Socket.IO event handler latency', ['event'])
+socketio_emit_seconds = metrics_registry.histogram('socketio_emit_duration_seconds', 'Time to emit an event to its rooms', ['event'])
+json_dumps_seconds = metrics_registry.histogram('json_serialization_duration_seconds', 'Time spent serializing JSON for HTTP responses and Socket.IO packets')
+mongo_command_seconds = metrics_registry.histogram('mongodb_command_duration_seconds', 'MongoDB command latency', ['command'])
+mongo_command_failures = metrics_registry.counter('mongodb_command_failures_total', 'Failed MongoDB commands', ['command'])
+errors_total = metrics_registry.counter('errors_total', 'Exceptions caught in HTTP routes and Socket.IO handlers', ['source'])
+# Opt-in: GET /debug/profile?seconds=N returns sampled stacks for flame graphs
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0') == '1'
+http_request_seconds = metrics.instrument_app(app, metrics_registry, PROFILING_ENABLED)
+
+class TimedJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        with json_dumps_seconds.time():
+            return super().dumps(obj, **kwargs)
+
+app.json = TimedJSONProvider(app)
+
+# Several server processes share emitted events through SOCKETIO_MESSAGE_QUEUE
+# (e.g. redis://localhost:6379/0); see serve.py
+SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
 # Specify exact origin for CORS, and allow credentials explicitly
-socketio = SocketIO(app, cors_allowed_origins=["http://localhost:3000"], cors_credentials=True)
+CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(',')
+# worker.py serves the app with gevent; the development server uses threads
+socketio = SocketIO(app, cors_allowed_origins=CORS_ORIGINS, cors_credentials=True,
+                    async_mode=os.environ.get('SOCKETIO_ASYNC_MODE', 'threading'),
+                    **message_queue.socketio_options(SOCKETIO_MESSAGE_QUEUE))
 
-# MongoDB Connection
-client = MongoClient('mongodb://localhost:27017/')
+# MongoDB Connection (MONGO_URI=mongomock:// runs against an in-memory mock)
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/')
+if MONGO_URI.startswith('mongomock://'):
+    import mongomock
+    client = mongomock.MongoClient()
+else:
+    client = MongoClient(MONGO_URI, event_listeners=[metrics.MongoCommandTimer(mongo_command_seconds, mongo_command_failures)])
 db = client['healthsync_db']
 posts_collection = db['posts']
 community_collection = db['communities']
 doctors_collection = db['doctors']
 patients_collection = db['patients']
+post_feed = PostFeed(posts_collection)
+
+# Vitals readings live in bucketed time-series documents, not in the patient document
+VITALS_RETENTION_DAYS = float(os.environ.get('VITALS_RETENTION_DAYS', '7'))
+vitals_store = VitalsStore(db, retention_s=int(VITALS_RETENTION_DAYS * 24 * 3600))
+
+# Chat messages have their own collection with a per-channel seq; see chat.py
+CHAT_COMMUNITIES = ['Global', 'Local_India']
+chat_store = ChatStore(
+    db,
+    tail_size=int(os.environ.get('CHAT_TAIL_SIZE', '50')),
+    retention_s=int(float(os.environ.get('CHAT_RETENTION_DAYS', '30')) * 24 * 3600),
+    max_per_channel=int(os.environ.get('CHAT_MAX_PER_CHANNEL', '100000')),
+    seq_ttl_s=float(os.environ.get('CHAT_SEQ_TTL_MS', '1000')) / 1000.0,
+)
+
+# Risk forecasts are precomputed for the whole cohort by run_forecasts();
+# the forecast endpoint only looks them up
+FORECAST_INTERVAL_S = float(os.environ.get('FORECAST_INTERVAL_S', '300'))
+forecast_job = ForecastJob(
+    db,
+    vitals_store,
+    window_s=int(float(os.environ.get('FORECAST_WINDOW_HOURS', '24')) * 3600),
+    chunk_size=int(os.environ.get('FORECAST_CHUNK_SIZE', '500')),
+    threshold=float(os.environ.get('ANOMALY_THRESHOLD', '0.7')),
+)
+
+# Incoming readings are written behind in batches instead of one round trip each
+vitals_writer = WriteBehindBuffer(
+    vitals_store.append_many,
+    max_batch=int(os.environ.get('VITALS_FLUSH_BATCH', '500')),
+    max_delay_s=float(os.environ.get('VITALS_FLUSH_INTERVAL_MS', '500')) / 1000.0,
+    max_pending=int(os.environ.get('VITALS_MAX_PENDING', '10000')),
+    name='vitals-writer',
+)
+# Bounded, so a database that stays down can't hang shutdown
+atexit.register(vitals_writer.close, timeout=float(os.environ.get('VITALS_CLOSE_TIMEOUT_S', '10')))
+
+# Read-through cache for doctors, communities, first feed pages, forecasts and
+# schemes; writes invalidate by group. CACHE_URL=redis://... shares it between
+# server processes, CACHE_TTL_S=0 turns it off.
+read_cache = ReadCache(
+    ttl_s=float(os.environ.get('CACHE_TTL_S', '30')),
+    max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', '1024')),
+    shared_url=os.environ.get('CACHE_URL'),
+)
+CACHE_GROUPS = ['communities', 'doctors', 'posts', 'forecast', 'schemes']
+
+metrics_registry.gauge('vitals_write_buffer_pending', 'Vitals readings queued for the next write-behind flush', lambda: vitals_writer.stats()['pending'])
+metrics_registry.counter_func('vitals_write_buffer_events_total', 'Vitals readings through the write-behind buffer by outcome', lambda: {
+    (k,): v for k, v in vitals_writer.stats().items() if k in ('accepted', 'written', 'dropped', 'failed')}, ['outcome'])
+metrics_registry.counter_func('vitals_write_buffer_flush_retries_total', 'Write-behind flushes retried after an error',
+                              lambda: vitals_writer.stats()['retried'])
+metrics_registry.counter_func('read_cache_lookups_total', 'Read cache lookups by result', lambda: {
+    (k,): v for k, v in read_cache.stats().items() if k in ('hits', 'sharedHits', 'misses')}, ['result'])
+
+# Turn SIGTERM into a normal exit so atexit flushes buffered vitals
+def exit_on_sigterm():
+    def handler(signum, frame):
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)  # don't interrupt the flush
+        sys.exit(0)
+    signal.signal(signal.SIGTERM, handler)
 
 # Decorator for error handling
 def handle_error(func):
@@ -27,35 +137,71 @@ def handle_error(func):
         try:
             return func(*args, **kwargs)
         except Exception as e:
+            app.logger.exception('Error in %s', request.path)
+            errors_total.inc(request.url_rule.rule if request.url_rule else request.path)
             return jsonify({"error": str(e)}), 500
     return wrapper
 
+# Cached reads return (value, etag); the values are shared, don't mutate them
+def find_community(query):
+    return read_cache.get('communities', json.dumps(query, sort_keys=True), lambda: community_collection.find_one(query, {"_id": 0}))
+
+def first_feed_page(community_id):
+    return read_cache.get('posts', community_id, lambda: post_feed.page(community_id))
+
+def load_top_doctors():
+    return {doc['region']: doc['doctors'] for doc in doctors_collection.find({}, {"_id": 0})}
+
+# JSON response with an ETag; 304 without a body if the client already has it
+def cached_response(value, etag):
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(value)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers.add('Access-Control-Expose-Headers', 'ETag')
+    return response
+
+# @socketio.on plus a latency histogram per event
+def socket_event(event):
+    def decorator(handler):
+        @wraps(handler)
+        def timed(*args, **kwargs):
+            with socketio_event_seconds.time(event):
+                return handler(*args, **kwargs)
+        return socketio.on(event)(timed)
+    return decorator
+
+def socket_error(e):
+    # Log and count a handler failure, and tell only the client that caused it
+    event = getattr(request, 'event', {}).get('message', 'unknown')
+    app.logger.exception('Error in Socket.IO event %s', event)
+    errors_total.inc(f"socketio:{event}")
+    emit('error', {"message": str(e)}, to=request.sid)
+
+def emit_to_rooms(event, data, to):
+    with socketio_emit_seconds.time(event):
+        socketio.emit(event, data, to=to)
+
 # Initialize sample data if not exists
 def initialize_data():
     if not posts_collection.find_one():
         initial_posts = [
-            {"id": "post1", "author": "Dr. Rajesh Kumar", "content": "New insights on heart health management", "imageUrl": "http://localhost:3000/images/1-heart-health.jpg", "likes": {}, "comments": ["Great post!", "Very informative"], "timestamp": datetime.now().isoformat(), "sharedTo": ["Global"]},
-            {"id": "post2", "author": "Dr. Emily Davis", "content": "Pediatric care tips for flu season", "imageUrl": "http://localhost:3000/images/4-pediatric-care.jpg", "likes": {}, "comments": ["Helpful!", "Thanks for sharing"], "timestamp": datetime.now().isoformat(), "sharedTo": ["Global"]},
-            {"id": "post3", "author": "Dr. Kumar", "content": "Neurology updates for stroke prevention", "imageUrl": "http://localhost:3000/images/2-neurology.jpg", "likes": {}, "comments": ["Useful info!", "Great work"], "timestamp": datetime.now().isoformat(), "sharedTo": ["Local_India"]},
-            {"id": "post4", "author": "Dr. Patel", "content": "Nutrition tips for better health", "imageUrl": "http://localhost:3000/images/3-nutrition-tips.jpg", "likes": {}, "comments": ["Very helpful!", "Thanks"], "timestamp": datetime.now().isoformat(), "sharedTo": ["Local_India"]},
+            {"id": "post1", "author": "Dr. Rajesh Kumar", "content": "New insights on heart health management", "imageUrl": "http://localhost:3000/images/1-heart-health.jpg", "likes": {}, "likeCount": 0, "comments": ["Great post!", "Very informative"], "timestamp": datetime.now().isoformat(), "sharedTo": ["Global"]},
+            {"id": "post2", "author": "Dr. Emily Davis", "content": "Pediatric care tips for flu season", "imageUrl": "http://localhost:3000/images/4-pediatric-care.jpg", "likes": {}, "likeCount": 0, "comments": ["Helpful!", "Thanks for sharing"], "timestamp": datetime.now().isoformat(), "sharedTo": ["Global"]},
+            {"id": "post3", "author": "Dr. Kumar", "content": "Neurology updates for stroke prevention", "imageUrl": "http://localhost:3000/images/2-neurology.jpg", "likes": {}, "likeCount": 0, "comments": ["Useful info!", "Great work"], "timestamp": datetime.now().isoformat(), "sharedTo": ["Local_India"]},
+            {"id": "post4", "author": "Dr. Patel", "content": "Nutrition tips for better health", "imageUrl": "http://localhost:3000/images/3-nutrition-tips.jpg", "likes": {}, "likeCount": 0, "comments": ["Very helpful!", "Thanks"], "timestamp": datetime.now().isoformat(), "sharedTo": ["Local_India"]},
         ]
         posts_collection.insert_many(initial_posts)
 
     if not community_collection.find_one():
         initial_communities = [
-            {"type": "Global", "location": None, "name": "Global Community", "members": ["Dr. Rajesh", "Dr. Emily", "Dr. Alice", "doc1"], "posts": [], "channels": {"general": [], "emergencies": []}, "messages": {"general": [], "emergencies": []}},
-            {"type": "Local", "location": "India", "name": "India Community", "members": ["Dr. Kumar", "Dr. Patel", "Dr. Sharma", "doc1"], "posts": [], "channels": {"general": [], "emergencies": []}, "messages": {"general": [], "emergencies": []}},
+            {"type": "Global", "location": None, "name": "Global Community", "members": ["Dr. Rajesh", "Dr. Emily", "Dr. Alice", "doc1"], "channels": {"general": [], "emergencies": []}},
+            {"type": "Local", "location": "India", "name": "India Community", "members": ["Dr. Kumar", "Dr. Patel", "Dr. Sharma", "doc1"], "channels": {"general": [], "emergencies": []}},
         ]
         community_collection.insert_many(initial_communities)
 
-        # Populate community posts based on sharedTo
-        for post in posts_collection.find():
-            for community_id in post['sharedTo']:
-                if community_id == 'Global':
-                    community_collection.update_one({"type": "Global", "location": None}, {"$push": {"posts": post}}, upsert=True)
-                elif community_id == 'Local_India':
-                    community_collection.update_one({"type": "Local", "location": "India"}, {"$push": {"posts": post}}, upsert=True)
-
     if not doctors_collection.find_one():
         initial_doctors = {
             "India": [
@@ -72,21 +218,50 @@ def initialize_data():
         doctors_collection.insert_many([{"region": region, "doctors": doctors} for region, doctors in initial_doctors.items()])
 
     if not patients_collection.find_one():
-        initial_patients = {
-            "patient1": [],
-            "patient2": [],
-            "patient3": [],
-        }
-        for patient_id, vitals in initial_patients.items():
-            patients_collection.insert_one({"patientId": patient_id, "vitals": vitals})
+        for patient_id in ["patient1", "patient2", "patient3"]:
+            patients_collection.insert_one({"patientId": patient_id})
+
+    vitals_store.ensure_indexes()
+    migrate_embedded_vitals()
+    chat_store.ensure_indexes()
+    forecast_job.ensure_indexes()
+    migrate_embedded_messages()
+    post_feed.ensure_indexes()
+    post_feed.backfill_like_counts()
+    # Posts used to be copied into communities.posts; the posts collection is now the only copy
+    community_collection.update_many({"posts": {"$exists": True}}, {"$unset": {"posts": ""}})
+    read_cache.invalidate(*CACHE_GROUPS)
+
+# Move readings from the old embedded patients.vitals arrays into the vitals store
+def migrate_embedded_vitals():
+    for patient in patients_collection.find({"vitals": {"$exists": True}}):
+        vitals_store.append_many([{**v, "patientId": patient['patientId']} for v in patient['vitals']])
+        patients_collection.update_one({"_id": patient['_id']}, {"$unset": {"vitals": ""}})
+
+# Move chat history from the old communities.messages arrays into the chat store
+def migrate_embedded_messages():
+    for community in community_collection.find({"messages": {"$exists": True}}):
+        community_id = community['type'] if not community.get('location') else f"{community['type']}_{community['location']}"
+        for channel, messages in community['messages'].items():
+            chat_store.append_many(community_id, channel, messages)
+        community_collection.update_one({"_id": community['_id']}, {"$unset": {"messages": ""}})
 
-initialize_data()
+# In multi-worker mode only one process seeds data and migrates (see serve.py)
+if os.environ.get('INIT_DATA', '1') == '1':
+    initialize_data()
+
+VITALS_DEFAULT_LIMIT = 500
+VITALS_MAX_LIMIT = 10000
 
 # API Endpoints with CORS headers
 @app.route('/api/patients', methods=['GET'])
 @handle_error
 def get_patients():
-    response = jsonify(list(patients_collection.find()))
+    patients = list(patients_collection.find({}, {"_id": 0}))
+    latest = vitals_store.latest_many([patient['patientId'] for patient in patients])
+    for patient in patients:
+        patient['latestVitals'] = latest.get(patient['patientId'])
+    response = jsonify(patients)
     response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
     response.headers.add('Access-Control-Allow-Credentials', 'true')
     return response
@@ -94,8 +269,30 @@ def get_patients():
 @app.route('/api/patients/<patient_id>/vitals', methods=['GET'])
 @handle_error
 def get_patient_vitals(patient_id):
-    patient = patients_collection.find_one({"patientId": patient_id})
-    response = jsonify(patient['vitals'] if patient else [])
+    # Optional query params: start/end (ISO timestamps), limit, and interval
+    # (seconds) to get min/max/avg per interval instead of raw readings
+    start = request.args.get('start')
+    end = request.args.get('end')
+    try:
+        limit = min(int(request.args.get('limit', VITALS_DEFAULT_LIMIT)), VITALS_MAX_LIMIT)
+        interval = request.args.get('interval', type=int)
+        if limit <= 0 or (interval is not None and interval <= 0):
+            raise ValueError("limit and interval must be positive")
+        if interval is not None:
+            result = vitals_store.downsample(patient_id, interval, start, end, limit)
+        else:
+            result = vitals_store.query(patient_id, start, end, limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response = jsonify(result)
+    response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
+    response.headers.add('Access-Control-Allow-Credentials', 'true')
+    return response
+
+@app.route('/api/vitals/write-stats', methods=['GET'])
+@handle_error
+def get_vitals_write_stats():
+    response = jsonify(vitals_writer.stats())
     response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
     response.headers.add('Access-Control-Allow-Credentials', 'true')
     return response
@@ -103,7 +300,12 @@ def get_patient_vitals(patient_id):
 @app.route('/api/patients/<patient_id>/forecast', methods=['GET'])
 @handle_error
 def get_patient_forecast(patient_id):
-    response = jsonify({"riskScore": "Low", "suggestion": "Maintain health", "days": 30})
+    forecast, etag = read_cache.get('forecast', patient_id, lambda: forecast_job.get(patient_id))
+    if forecast is None:
+        response = jsonify({"error": "No forecast for this patient yet"})
+        response.status_code = 404
+    else:
+        response = cached_response(forecast, etag)
     response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
     response.headers.add('Access-Control-Allow-Credentials', 'true')
     return response
@@ -111,7 +313,7 @@ def get_patient_forecast(patient_id):
 @app.route('/api/patients/<patient_id>/schemes', methods=['GET'])
 @handle_error
 def get_patient_schemes(patient_id):
-    response = jsonify({"name": "Health Plan", "description": "Basic health insurance", "eligibility": "All patients"})
+    response = cached_response(*read_cache.get('schemes', patient_id, lambda: {"name": "Health Plan", "description": "Basic health insurance", "eligibility": "All patients"}))
     response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
     response.headers.add('Access-Control-Allow-Credentials', 'true')
     return response
@@ -124,8 +326,8 @@ def get_community():
     query = {"type": type}
     if location:
         query["location"] = location
-    community = community_collection.find_one(query)
-    response = jsonify(community if community else {})
+    community, etag = find_community(query)
+    response = cached_response(community if community else {}, etag)
     response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
     response.headers.add('Access-Control-Allow-Credentials', 'true')
     return response
@@ -133,13 +335,16 @@ def get_community():
 @app.route('/api/community/<community_id>/posts', methods=['GET'])
 @handle_error
 def get_community_posts(community_id):
-    if community_id == 'Global':
-        community = community_collection.find_one({"type": "Global", "location": None})
-    elif community_id == 'Local_India':
-        community = community_collection.find_one({"type": "Local", "location": "India"})
-    else:
-        response = jsonify([])
-    response = jsonify(community['posts'] if community and 'posts' in community else [])
+    # Newest first, one page at a time; pass the X-Next-Cursor header of a
+    # response back as ?cursor= to get the next page
+    try:
+        posts, next_cursor = post_feed.page(community_id, request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response = jsonify(posts)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    response.headers.add('Access-Control-Expose-Headers', 'X-Next-Cursor')
     response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
     response.headers.add('Access-Control-Allow-Credentials', 'true')
     return response
@@ -147,18 +352,12 @@ def get_community_posts(community_id):
 @app.route('/api/community/<community_id>/messages/<channel>', methods=['GET'])
 @handle_error
 def get_community_messages(community_id, channel):
-    if channel not in ['general', 'emergencies']:
+    # Recent history, or with ?since=<seq> only the messages after it (see ChatStore.since)
+    if channel not in CHANNELS:
         return jsonify({"error": "Invalid channel"}), 400
-    if community_id == 'Global':
-        community = community_collection.find_one({"type": "Global", "location": None})
-    elif community_id == 'Local_India':
-        community = community_collection.find_one({"type": "Local", "location": "India"})
-    else:
-        response = jsonify([])
-    if not community or 'messages' not in community or channel not in community['messages']:
-        response = jsonify([])
-    else:
-        response = jsonify(community['messages'][channel])
+    since = request.args.get('since', type=int)
+    limit = request.args.get('limit', DEFAULT_SYNC_LIMIT, type=int)
+    response = jsonify(chat_store.since(community_id, channel, since, limit))
     response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
     response.headers.add('Access-Control-Allow-Credentials', 'true')
     return response
@@ -166,62 +365,115 @@ def get_community_messages(community_id, channel):
 @app.route('/api/community/top-doctors', methods=['GET'])
 @handle_error
 def get_top_doctors():
-    doctors = list(doctors_collection.find())
-    result = {}
-    for doc in doctors:
-        result[doc['region']] = doc['doctors']
-    response = jsonify(result if result else {})
+    response = cached_response(*read_cache.get('doctors', 'all', load_top_doctors))
+    response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
+    response.headers.add('Access-Control-Allow-Credentials', 'true')
+    return response
+
+@app.route('/api/cache/stats', methods=['GET'])
+@handle_error
+def get_cache_stats():
+    response = jsonify(read_cache.stats())
     response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
     response.headers.add('Access-Control-Allow-Credentials', 'true')
     return response
 
 # SocketIO Events
-@socketio.on('connect')
-def handle_connect():
-    print(f'New client connected: {request.sid}')
-    emit('connected', {'message': 'Connected to server'}, room=request.sid)
-    # Send initial data to new client
-    global_posts = list(posts_collection.find({"sharedTo": "Global"}))
-    local_posts = list(posts_collection.find({"sharedTo": "Local_India"}))
-    global_community = community_collection.find_one({"type": "Global", "location": None})
-    local_community = community_collection.find_one({"type": "Local", "location": "India"})
-    emit('initialData', {
-        'posts': global_posts + local_posts,
-        'messages': {
-            'Global': global_community['messages'] if global_community else {'general': [], 'emergencies': []},
-            'Local_India': local_community['messages'] if local_community else {'general': [], 'emergencies': []},
-        }
-    }, room=request.sid)
+@socket_event('connect')
+def handle_connect(auth=None):
+    try:
+        print(f'New client connected: {request.sid}')
+        emit('connected', {'message': 'Connected to server'}, room=request.sid)
+        # Send initial data to new client: only the first page of each feed
+        (global_posts, global_cursor), _ = first_feed_page("Global")
+        (local_posts, local_cursor), _ = first_feed_page("Local_India")
+        seen = {post['id'] for post in global_posts}
+        seqs = message_seqs(auth)
+        emit('initialData', {
+            'posts': global_posts + [post for post in local_posts if post['id'] not in seen],
+            'postCursors': {'Global': global_cursor, 'Local_India': local_cursor},
+            'messages': {
+                community_id: {channel: chat_store.since(community_id, channel, seqs.get(community_id, {}).get(channel), chat_store.tail_size)
+                               for channel in CHANNELS}
+                for community_id in CHAT_COMMUNITIES
+            },
+        }, room=request.sid)
+    except Exception as e:
+        socket_error(e)
+
+# A reconnecting client passes the last seq it has per channel in its auth
+# payload ({"messageSeqs": {"Global": {"general": 12}}}) and only gets newer
+# messages; malformed entries are ignored, so that channel gets its recent history
+def message_seqs(auth):
+    seqs = auth.get('messageSeqs') if isinstance(auth, dict) else None
+    if not isinstance(seqs, dict):
+        return {}
+    valid = {}
+    for community_id, channels in seqs.items():
+        if not isinstance(channels, dict):
+            continue
+        for channel, seq in channels.items():
+            if isinstance(seq, int) and not isinstance(seq, bool) and seq >= 0:
+                valid.setdefault(community_id, {})[channel] = seq
+    return valid
 
-@socketio.on('vitalsUpdate')
+# Clients receive only what they subscribe to; see rooms.py for the payload
+@socket_event('subscribe')
+def handle_subscribe(data):
+    try:
+        rooms = rooms_from_subscription(data)
+        for room in rooms:
+            join_room(room)
+        return {"rooms": rooms}
+    except Exception as e:
+        socket_error(e)
+
+@socket_event('unsubscribe')
+def handle_unsubscribe(data):
+    try:
+        rooms = rooms_from_subscription(data)
+        for room in rooms:
+            leave_room(room)
+        return {"rooms": rooms}
+    except Exception as e:
+        socket_error(e)
+
+@socket_event('vitalsUpdate')
 def handle_vitals_update(data):
     try:
-        patient_id = data['patientId']
-        patients_collection.update_one({"patientId": patient_id}, {"$push": {"vitals": data}})
-        socketio.emit('vitalsUpdate', data, broadcast=True)
+        # Reject a bad reading here rather than in the batch it would be flushed with
+        check_reading(data)
+        vitals_writer.put(data)
+        emit_to_rooms('vitalsUpdate', data, to=patient_rooms(data['patientId']))
     except Exception as e:
-        socketio.emit('error', {"message": str(e)}, broadcast=True)
+        socket_error(e)
 
-@socketio.on('addPatient')
+@socket_event('addPatient')
 def handle_add_patient(data):
     try:
         patient_id = data['patientId']
         initial_vitals = {"patientId": patient_id, "heartRate": 80, "spO2": 98, "timestamp": datetime.now().isoformat(), "prediction": "Normal", "activityLevel": "Low", "recoveryRate": "85%", "anomalyScore": 0.2, "isVerySerious": False}
-        patients_collection.update_one({"patientId": patient_id}, {"$set": {"vitals": [initial_vitals]}}, upsert=True)
-        socketio.emit('vitalsUpdate', initial_vitals, broadcast=True)
+        patients_collection.update_one({"patientId": patient_id}, {"$setOnInsert": {"patientId": patient_id}}, upsert=True)
+        vitals_writer.put(initial_vitals)
+        join_room(patient_room(patient_id))
+        emit_to_rooms('vitalsUpdate', initial_vitals, to=patient_rooms(patient_id))
     except Exception as e:
-        socketio.emit('error', {"message": str(e)}, broadcast=True)
+        socket_error(e)
 
-@socketio.on('removePatient')
+@socket_event('removePatient')
 def handle_remove_patient(data):
     try:
         patient_id = data['patientId']
         patients_collection.delete_one({"patientId": patient_id})
-        socketio.emit('patientRemoved', {"patientId": patient_id}, broadcast=True)
+        vitals_store.delete_patient(patient_id)
+        forecast_job.delete(patient_id)
+        read_cache.invalidate('forecast')
+        emit_to_rooms('patientRemoved', {"patientId": patient_id}, to=patient_rooms(patient_id))
+        close_room(patient_room(patient_id))
     except Exception as e:
-        socketio.emit('error', {"message": str(e)}, broadcast=True)
+        socket_error(e)
 
-@socketio.on('createPost')
+@socket_event('createPost')
 def handle_create_post(data):
     try:
         post = {
@@ -229,91 +481,93 @@ def handle_create_post(data):
             "author": data['author'],
             "content": data['content'],
             "imageUrl": data['imageUrl'],
-            "likes": {data['author']: False},  # Track likes per user
+            "likes": {like_key(data['author']): False},  # Track likes per user
+            "likeCount": 0,
             "comments": [],
             "timestamp": datetime.now().isoformat(),
-            "sharedTo": data.get('sharedTo', []),
+            "sharedTo": list(data.get('sharedTo', [])),
         }
+        # A post shows up in a community feed through sharedTo
+        if data.get('communityId') and data['communityId'] not in post['sharedTo']:
+            post['sharedTo'].append(data['communityId'])
         posts_collection.insert_one(post)
-        if data.get('communityId'):
-            community_id = data['communityId']
-            if community_id == 'Global':
-                community_collection.update_one({"type": "Global", "location": None}, {"$push": {"posts": post}}, upsert=True)
-            elif community_id == 'Local_India':
-                community_collection.update_one({"type": "Local", "location": "India"}, {"$push": {"posts": post}}, upsert=True)
-        socketio.emit('newPost', {"post": post}, broadcast=True)
+        read_cache.invalidate('posts')
+        post.pop('_id', None)
+        emit_to_rooms('newPost', {"post": post}, to=community_rooms(post['sharedTo']))
     except Exception as e:
-        socketio.emit('error', {"message": str(e)}, broadcast=True)
+        socket_error(e)
 
-@socketio.on('likePost')
+@socket_event('likePost')
 def handle_like_post(data):
     try:
         post_id = data['postId']
-        user = data['user']
-        post = posts_collection.find_one({"id": post_id})
-        if post and not post['likes'].get(user, False):
-            posts_collection.update_one({"id": post_id}, {"$set": {"likes": {**post['likes'], user: True}}})
-            updated_post = posts_collection.find_one({"id": post_id})
-            socketio.emit('postUpdated', {"postId": post_id, "likes": sum(1 for v in updated_post['likes'].values() if v), "comments": updated_post['comments']}, broadcast=True)
+        liked = post_feed.like(post_id, data['user'])
+        if liked is not None:
+            read_cache.invalidate('posts')
+            likes, shared_to = liked
+            emit_to_rooms('postUpdated', {"postId": post_id, "likes": likes}, to=community_rooms(shared_to))
     except Exception as e:
-        socketio.emit('error', {"message": str(e)}, broadcast=True)
+        socket_error(e)
 
-@socketio.on('commentPost')
+@socket_event('commentPost')
 def handle_comment_post(data):
     try:
         post_id = data['postId']
         user = data['user']
         comment = f"{user}: {data['comment']}"
-        post = posts_collection.find_one({"id": post_id})
-        if post:
-            posts_collection.update_one({"id": post_id}, {"$push": {"comments": comment}})
-            updated_post = posts_collection.find_one({"id": post_id})
-            socketio.emit('postUpdated', {"postId": post_id, "likes": sum(1 for v in updated_post['likes'].values() if v), "comments": updated_post['comments']}, broadcast=True)
+        commented = post_feed.comment(post_id, comment)
+        if commented is not None:
+            read_cache.invalidate('posts')
+            likes, shared_to = commented
+            # Only the new comment is sent; clients append it to what they have
+            emit_to_rooms('postUpdated', {"postId": post_id, "likes": likes, "comment": comment}, to=community_rooms(shared_to))
     except Exception as e:
-        socketio.emit('error', {"message": str(e)}, broadcast=True)
+        socket_error(e)
 
-@socketio.on('communityMessage')
+@socket_event('communityMessage')
 def handle_community_message(data):
     try:
         community_id = data['communityId']
         channel = data['channel']
         message = data['message']
-        if channel not in ['general', 'emergencies']:
+        if channel not in CHANNELS:
             raise ValueError("Invalid channel")
-        if community_id == 'Global':
-            community_collection.update_one({"type": "Global", "location": None}, {"$push": {"messages." + channel: message}}, upsert=True)
-        elif community_id == 'Local_India':
-            community_collection.update_one({"type": "Local", "location": "India"}, {"$push": {"messages." + channel: message}}, upsert=True)
-        socketio.emit('communityMessage', {"communityId": community_id, "channel": channel, "message": message}, broadcast=True)
+        message = chat_store.append(community_id, channel, message)
+        emit_to_rooms('communityMessage', {"communityId": community_id, "channel": channel, "message": message}, to=channel_room(community_id, channel))
     except Exception as e:
-        socketio.emit('error', {"message": str(e)}, broadcast=True)
+        socket_error(e)
 
-@socketio.on('connectDoctor')
+@socket_event('connectDoctor')
 def handle_connect_doctor(data):
     try:
         from_user = data['from']
         to_user = data['to']
         doctors_collection.update_one({"region": {"$in": ["India", "USA", "UK"]}, "doctors.username": to_user}, {"$set": {"doctors.$.status": "Connected"}})
-        socketio.emit('connectionUpdate', {"from": from_user, "to": to_user, "status": "Connected"}, broadcast=True)
+        read_cache.invalidate('doctors')
+        emit_to_rooms('connectionUpdate', {"from": from_user, "to": to_user, "status": "Connected"}, to=[user_room(from_user), user_room(to_user)])
         # Automatically switch to Private community for chatting
-        socketio.emit('switchToPrivateCommunity', {"user": from_user, "communityId": "Local_India"}, room=from_user)
+        emit_to_rooms('switchToPrivateCommunity', {"user": from_user, "communityId": "Local_India"}, to=user_room(from_user))
     except Exception as e:
-        socketio.emit('error', {"message": str(e)}, broadcast=True)
+        socket_error(e)
 
-@socketio.on('disconnectDoctor')
+@socket_event('disconnectDoctor')
 def handle_disconnect_doctor(data):
     try:
         from_user = data['from']
         to_user = data['to']
         doctors_collection.update_one({"region": {"$in": ["India", "USA", "UK"]}, "doctors.username": to_user}, {"$set": {"doctors.$.status": "Disconnected"}})
-        socketio.emit('connectionUpdate', {"from": from_user, "to": to_user, "status": "Disconnected"}, broadcast=True)
+        read_cache.invalidate('doctors')
+        emit_to_rooms('connectionUpdate', {"from": from_user, "to": to_user, "status": "Disconnected"}, to=[user_room(from_user), user_room(to_user)])
     except Exception as e:
-        socketio.emit('error', {"message": str(e)}, broadcast=True)
+        socket_error(e)
 
 # Simulate live patient data (using a model-like approach)
+SIMULATED_PATIENTS = int(os.environ.get('SIMULATED_PATIENTS', '3'))
+SIMULATION_INTERVAL_S = float(os.environ.get('SIMULATION_INTERVAL_S', '3'))
+
 def simulate_patient_data():
+    patient_ids = [f'patient{i + 1}' for i in range(SIMULATED_PATIENTS)]
     while True:
-        patient_ids = ['patient1', 'patient2', 'patient3']
         for patient_id in patient_ids:
             vitals = {
                 "patientId": patient_id,
@@ -326,11 +580,46 @@ def simulate_patient_data():
                 "anomalyScore": random.random() * 0.8,
                 "isVerySerious": random.random() < 0.05,
             }
-            socketio.emit('vitalsUpdate', vitals, broadcast=True)
-            patients_collection.update_one({"patientId": patient_id}, {"$push": {"vitals": vitals}})
-        time.sleep(3)  # Update every 3 seconds
+            emit_to_rooms('vitalsUpdate', vitals, to=patient_rooms(patient_id))
+            vitals_writer.put(vitals)
+        time.sleep(SIMULATION_INTERVAL_S)  # Update every 3 seconds by default
+
+# Compact raw vitals older than the retention window into hourly rollups,
+# and drop chat messages past their retention
+def run_vitals_retention(interval=3600):
+    while True:
+        try:
+            vitals_store.compact()
+        except Exception as e:
+            print(f'Vitals retention failed: {e}')
+        try:
+            chat_store.compact()
+        except Exception as e:
+            print(f'Chat retention failed: {e}')
+        time.sleep(interval)
+
+# Rescore patients with new readings every FORECAST_INTERVAL_S
+def run_forecasts(interval=None):
+    while True:
+        try:
+            forecast_job.run()
+            read_cache.invalidate('forecast')
+        except Exception as e:
+            print(f'Forecast job failed: {e}')
+        time.sleep(interval or FORECAST_INTERVAL_S)
+
+# With RUN_PRODUCER=0 the simulator, retention and forecast jobs run in producer.py instead
+def start_background_jobs():
+    if os.environ.get('RUN_PRODUCER', '1') == '1':
+        socketio.start_background_task(simulate_patient_data)
+        socketio.start_background_task(run_vitals_retention)
+        socketio.start_background_task(run_forecasts)
 
+# Development server only; worker.py (and serve.py) run the app in production
 if __name__ == '__main__':
-    import threading
-    threading.Thread(target=simulate_patient_data, daemon=True).start()
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    if os.environ.get('DEBUG', '1') != '1':
+        sys.exit('model.py runs the Werkzeug development server; run worker.py (or serve.py) with DEBUG=0')
+    exit_on_sigterm()
+    start_background_jobs()
+    socketio.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', '5000')), debug=True,
+                 use_reloader=True, allow_unsafe_werkzeug=True)
@@ -0,0 +1,23 @@
+"""The single producer process of a multi-worker deployment.
+
+Runs the vitals simulator, the retention job and the forecast job exactly
+once. Events are emitted through SOCKETIO_MESSAGE_QUEUE, so every Socket.IO
+worker delivers them to its own clients. Started by serve.py.
+"""
+import threading
+
+import model
+
+
+def main():
+    model.exit_on_sigterm()
+    if not model.SOCKETIO_MESSAGE_QUEUE:
+        print('Warning: SOCKETIO_MESSAGE_QUEUE is not set; events will not reach any worker')
+    threading.Thread(target=model.run_vitals_retention, daemon=True).start()
+    threading.Thread(target=model.run_forecasts, daemon=True).start()
+    print(f'Producer simulating {model.SIMULATED_PATIENTS} patients every {model.SIMULATION_INTERVAL_S}s', flush=True)
+    model.simulate_patient_data()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# Socket.IO room names. Clients join rooms explicitly with the 'subscribe'
+# event and only receive events for what they subscribed to.
+CHANNELS = ['general', 'emergencies']
+ALL_PATIENTS = 'patients:all'  # monitoring dashboards that show every patient
+
+
+def patient_room(patient_id):
+    return f"patient:{patient_id}"
+
+
+def patient_rooms(patient_id):
+    return [patient_room(patient_id), ALL_PATIENTS]
+
+
+def community_room(community_id):
+    return f"community:{community_id}"
+
+
+def community_rooms(community_ids):
+    return [community_room(c) for c in community_ids]
+
+
+def channel_room(community_id, channel):
+    return f"channel:{community_id}:{channel}"
+
+
+def user_room(user):
+    return f"user:{user}"
+
+
+def rooms_from_subscription(data):
+    """Map a subscribe/unsubscribe payload to room names.
+
+    {"patients": ["patient1"] or "*", "communities": ["Global"],
+     "channels": [{"communityId": "Global", "channel": "general"}], "user": "doc1"}
+    """
+    rooms = []
+    patients = data.get('patients', [])
+    if patients == '*':
+        rooms.append(ALL_PATIENTS)
+    else:
+        rooms.extend(patient_room(p) for p in patients)
+    rooms.extend(community_room(c) for c in data.get('communities', []))
+    for entry in data.get('channels', []):
+        if entry['channel'] not in CHANNELS:
+            raise ValueError("Invalid channel")
+        rooms.append(channel_room(entry['communityId'], entry['channel']))
+    if data.get('user'):
+        rooms.append(user_room(data['user']))
+    return rooms
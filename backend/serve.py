@@ -0,0 +1,82 @@
+"""Run the backend as several Socket.IO worker processes plus one producer.
+
+    python serve.py --workers 4 --base-port 5001 --message-queue redis://localhost:6379/0
+
+Workers run worker.py, the app on gevent, and listen on consecutive ports
+starting at --base-port. They share emitted events through the message
+queue. Put a load balancer with sticky sessions in front of them, e.g. nginx
+with ip_hash, because Socket.IO's polling transport needs every request of a
+session to reach the same worker. Seeding and migrations run once before the
+workers start. The simulator and retention job run in a single producer.py
+process, so adding workers never duplicates them. filesystem:///path/to/dir
+can stand in for Redis on one machine.
+
+The read cache must be shared too: otherwise a write in one worker, or a
+forecast run in the producer, doesn't invalidate what the other workers have
+cached. --cache-url (CACHE_URL) defaults to the message queue when that is
+Redis. With any other queue, set it or turn the cache off with CACHE_TTL_S=0.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def start(script, env):
+    return subprocess.Popen([sys.executable, script], cwd=BACKEND_DIR, env=env)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--base-port', type=int, default=5001)
+    parser.add_argument('--message-queue', default=os.environ.get('SOCKETIO_MESSAGE_QUEUE', 'redis://localhost:6379/0'))
+    parser.add_argument('--cache-url', default=os.environ.get('CACHE_URL'),
+                        help='redis:// URL for the shared read cache (default: the message queue if it is Redis)')
+    parser.add_argument('--no-producer', action='store_true', help='do not start the simulator/retention process')
+    args = parser.parse_args()
+
+    env = {**os.environ, 'SOCKETIO_MESSAGE_QUEUE': args.message_queue, 'DEBUG': '0', 'PYTHONUNBUFFERED': '1'}
+    cache_url = args.cache_url or (args.message_queue if args.message_queue.startswith(('redis://', 'rediss://')) else None)
+    if cache_url:
+        env['CACHE_URL'] = cache_url
+    elif float(env.get('CACHE_TTL_S', '30')) > 0:
+        print('Warning: no --cache-url/CACHE_URL; each worker keeps its own read cache, so writes in one worker '
+              'and forecast runs in the producer are not seen by the others until entries expire (CACHE_TTL_S). '
+              'Set CACHE_URL=redis://... or CACHE_TTL_S=0.', file=sys.stderr, flush=True)
+    subprocess.run([sys.executable, '-c', 'import model'], cwd=BACKEND_DIR, env=env, check=True)
+
+    env['INIT_DATA'] = '0'
+    processes = [start('worker.py', {**env, 'PORT': str(args.base_port + i), 'RUN_PRODUCER': '0'})
+                 for i in range(args.workers)]
+    if not args.no_producer:
+        processes.append(start('producer.py', env))
+    print(f'Started {args.workers} workers on ports {args.base_port}-{args.base_port + args.workers - 1}', flush=True)
+
+    def stop(signum=None, frame=None):
+        for p in processes:
+            if p.poll() is None:
+                p.terminate()
+        for p in processes:
+            try:
+                p.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        while all(p.poll() is None for p in processes):
+            time.sleep(1)
+        print('A child process exited; shutting down', flush=True)
+    except KeyboardInterrupt:
+        pass
+    stop()
+
+
+if __name__ == '__main__':
+    main()
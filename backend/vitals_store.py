@@ -0,0 +1,281 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+NUMERIC_FIELDS = ['heartRate', 'spO2', 'respirationRate', 'temperature', 'anomalyScore']
+
+
+def to_utc(value):
+    """Parse an ISO string or datetime into a naive UTC datetime (what pymongo returns)."""
+    if value is None:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    # Naive values are taken as local time, matching datetime.now().isoformat()
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def check_reading(reading):
+    """Raise ValueError unless reading has a patientId and a parseable timestamp."""
+    if not isinstance(reading, dict) or not reading.get('patientId'):
+        raise ValueError("patientId is required")
+    timestamp = reading.get('timestamp')
+    if timestamp is not None and not isinstance(timestamp, (str, datetime)):
+        raise ValueError(f"Invalid timestamp: {timestamp!r}")
+    try:
+        return to_utc(timestamp)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid timestamp: {timestamp!r}") from None
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class VitalsStore:
+    """Bucketed time-series storage for vitals readings.
+
+    Readings are appended to per-patient bucket documents covering
+    bucket_span_s seconds and holding at most bucket_size readings, so no
+    document grows without bound. Buckets that age past the retention window
+    are compacted into hourly min/max/sum/count rollups and deleted.
+    """
+
+    def __init__(self, db, bucket_span_s=3600, bucket_size=200, retention_s=7 * 24 * 3600, rollup_span_s=3600):
+        self.buckets = db['vitals_buckets']
+        self.rollups = db['vitals_rollups']
+        self.bucket_span_s = bucket_span_s
+        self.bucket_size = bucket_size
+        self.retention_s = retention_s
+        self.rollup_span_s = rollup_span_s
+
+    def ensure_indexes(self):
+        self.buckets.create_index([("patientId", ASCENDING), ("start", ASCENDING)])
+        self.buckets.create_index([("patientId", ASCENDING), ("last", DESCENDING)])
+        self.buckets.create_index([("end", ASCENDING)])
+        self.buckets.create_index([("updatedAt", ASCENDING)])
+        self.rollups.create_index([("patientId", ASCENDING), ("start", ASCENDING)], unique=True)
+
+    def _bucket_start(self, ts, span_s):
+        epoch = int(ts.replace(tzinfo=timezone.utc).timestamp())
+        return datetime.fromtimestamp(epoch - epoch % span_s, timezone.utc).replace(tzinfo=None)
+
+    def _append_op(self, patient_id, start, docs, written_at):
+        # Only a bucket with room for all of docs matches the filter; otherwise
+        # the upsert opens a new bucket for the same window.
+        ts = [doc['ts'] for doc in docs]
+        return UpdateOne(
+            {"patientId": patient_id, "start": start, "count": {"$lte": self.bucket_size - len(docs)}},
+            {
+                "$push": {"readings": {"$each": docs}},
+                "$inc": {"count": len(docs)},
+                "$min": {"first": min(ts)},
+                "$max": {"last": max(ts), "updatedAt": written_at},
+                "$setOnInsert": {"end": start + timedelta(seconds=self.bucket_span_s)},
+            },
+            upsert=True,
+        )
+
+    def append(self, reading):
+        self.append_many([reading])
+
+    def append_many(self, readings):
+        """Store readings; returns how many were skipped as invalid.
+
+        A reading without a patientId or with an unparseable timestamp is
+        skipped on its own, so it can't fail the rest of the batch.
+        """
+        # Readings for the same patient and window are pushed together, so a
+        # batch costs one update per bucket rather than one per reading.
+        groups = {}
+        skipped = 0
+        for reading in readings:
+            try:
+                ts = check_reading(reading)
+            except ValueError as e:
+                print(f'Skipping vitals reading: {e}')
+                skipped += 1
+                continue
+            doc = {**reading, 'ts': ts}
+            doc.pop('_id', None)
+            key = (reading['patientId'], self._bucket_start(doc['ts'], self.bucket_span_s))
+            groups.setdefault(key, []).append(doc)
+        ops = []
+        written_at = to_utc(None)
+        for (patient_id, start), docs in groups.items():
+            for i in range(0, len(docs), self.bucket_size):
+                ops.append(self._append_op(patient_id, start, docs[i:i + self.bucket_size], written_at))
+        if ops:
+            self.buckets.bulk_write(ops, ordered=True)
+        return skipped
+
+    def delete_patient(self, patient_id):
+        self.buckets.delete_many({"patientId": patient_id})
+        self.rollups.delete_many({"patientId": patient_id})
+
+    def updated_patients(self, since=None):
+        """Patients with readings written after since (a naive UTC datetime), or all of them."""
+        return self.buckets.distinct("patientId", {"updatedAt": {"$gt": since}} if since is not None else {})
+
+    def buckets_for(self, patient_ids, start, end):
+        """Buckets of several patients that overlap [start, end], for cohort-wide jobs."""
+        return self.buckets.find(
+            {"patientId": {"$in": list(patient_ids)}, "last": {"$gte": start}, "first": {"$lte": end}},
+            {"_id": 0, "patientId": 1, "readings": 1},
+        )
+
+    def latest(self, patient_id):
+        return self.latest_many([patient_id]).get(patient_id)
+
+    def latest_many(self, patient_ids):
+        """{patientId: newest reading} for several patients in one aggregation.
+
+        The (patientId, last) index serves the sort, so each patient's newest
+        bucket is found without sorting its buckets in memory.
+        """
+        pipeline = [
+            {"$match": {"patientId": {"$in": list(patient_ids)}}},
+            {"$sort": {"patientId": ASCENDING, "last": DESCENDING}},
+            {"$group": {"_id": "$patientId", "reading": {"$first": {"$arrayElemAt": ["$readings", -1]}}}},
+        ]
+        return {doc['_id']: _public(doc['reading']) for doc in self.buckets.aggregate(pipeline) if doc.get('reading')}
+
+    def _buckets_in_range(self, patient_id, start, end):
+        query = {"patientId": patient_id}
+        if start is not None:
+            query["last"] = {"$gte": start}
+        if end is not None:
+            query["first"] = {"$lte": end}
+        return self.buckets.find(query, {"_id": 0, "start": 1, "readings": 1}).sort("start", DESCENDING)
+
+    def _readings_in_range(self, bucket, start, end):
+        return [r for r in bucket['readings']
+                if (start is None or r['ts'] >= start) and (end is None or r['ts'] <= end)]
+
+    def query(self, patient_id, start=None, end=None, limit=None):
+        """Raw readings in [start, end], oldest first; limit keeps the most recent."""
+        start = to_utc(start) if start is not None else None
+        end = to_utc(end) if end is not None else None
+        selected = []
+        window = None
+        for bucket in self._buckets_in_range(patient_id, start, end):
+            # Buckets arrive newest window first, and every reading in an older
+            # window is older than all those already collected, so once a
+            # window boundary is crossed with enough readings we can stop.
+            if limit is not None and bucket['start'] != window and len(selected) >= limit:
+                break
+            window = bucket['start']
+            selected.extend(self._readings_in_range(bucket, start, end))
+        selected.sort(key=lambda r: r['ts'])
+        if limit is not None:
+            selected = selected[-limit:]
+        return [_public(r) for r in selected]
+
+    def downsample(self, patient_id, interval_s, start=None, end=None, limit=None):
+        """min/max/avg per numeric field over fixed intervals, oldest first.
+
+        Covers both raw buckets and compacted rollups; rollups only resolve
+        to rollup_span_s, so finer intervals over compacted ranges are
+        reported at that granularity.
+        """
+        start = to_utc(start) if start is not None else None
+        end = to_utc(end) if end is not None else None
+
+        readings = []
+        for bucket in self._buckets_in_range(patient_id, start, end):
+            readings.extend(self._readings_in_range(bucket, start, end))
+        partials = _aggregate_readings(readings, interval_s)
+
+        rollup_query = {"patientId": patient_id}
+        start_range = {}
+        if start is not None:
+            start_range["$gte"] = self._bucket_start(start, self.rollup_span_s)
+        if end is not None:
+            start_range["$lte"] = end
+        if start_range:
+            rollup_query["start"] = start_range
+        for rollup in self.rollups.find(rollup_query, {"_id": 0}):
+            _merge_partial(partials, _epoch(rollup['start']) // interval_s, rollup['count'], rollup['fields'])
+
+        rows = [_finish_partial(key * interval_s, partial) for key, partial in sorted(partials.items())]
+        return rows[-limit:] if limit is not None else rows
+
+    def compact(self, now=None):
+        """Roll raw buckets older than the retention window up into hourly aggregates."""
+        now = to_utc(now)
+        cutoff = now - timedelta(seconds=self.retention_s)
+        compacted = 0
+        for bucket in self.buckets.find({"end": {"$lte": cutoff}}):
+            partials = _aggregate_readings(bucket['readings'], self.rollup_span_s)
+            ops = []
+            for key, partial in partials.items():
+                update = {"$inc": {"count": partial['count']}}
+                for field, agg in partial['fields'].items():
+                    update["$inc"][f"fields.{field}.sum"] = agg['sum']
+                    update["$inc"][f"fields.{field}.n"] = agg['n']
+                    update.setdefault("$min", {})[f"fields.{field}.min"] = agg['min']
+                    update.setdefault("$max", {})[f"fields.{field}.max"] = agg['max']
+                start = datetime.fromtimestamp(key * self.rollup_span_s, timezone.utc).replace(tzinfo=None)
+                ops.append(UpdateOne({"patientId": bucket['patientId'], "start": start}, update, upsert=True))
+            if ops:
+                self.rollups.bulk_write(ops, ordered=False)
+            self.buckets.delete_one({"_id": bucket['_id']})
+            compacted += 1
+        return compacted
+
+
+def _public(reading):
+    return {k: v for k, v in reading.items() if k not in ('ts', '_id')}
+
+
+def _epoch(ts):
+    return int(ts.replace(tzinfo=timezone.utc).timestamp())
+
+
+def _aggregate_readings(readings, interval_s):
+    """Reduce readings to {interval key: {'count', 'fields': {field: {sum, n, min, max}}}} with NumPy."""
+    if not readings:
+        return {}
+    keys = np.fromiter((_epoch(r['ts']) // interval_s for r in readings), dtype=np.int64, count=len(readings))
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    unique_keys, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+    partials = {int(k): {'count': int(c), 'fields': {}} for k, c in zip(unique_keys, counts)}
+    for field in NUMERIC_FIELDS:
+        values = np.fromiter((_as_float(r.get(field)) for r in readings), dtype=np.float64, count=len(readings))[order]
+        present = ~np.isnan(values)
+        if not present.any():
+            continue
+        n = np.add.reduceat(present.astype(np.int64), starts)
+        sums = np.add.reduceat(np.where(present, values, 0.0), starts)
+        mins = np.minimum.reduceat(np.where(present, values, np.inf), starts)
+        maxs = np.maximum.reduceat(np.where(present, values, -np.inf), starts)
+        for i, key in enumerate(unique_keys):
+            if n[i]:
+                partials[int(key)]['fields'][field] = {'sum': float(sums[i]), 'n': int(n[i]), 'min': float(mins[i]), 'max': float(maxs[i])}
+    return partials
+
+
+def _merge_partial(partials, key, count, fields):
+    partial = partials.setdefault(int(key), {'count': 0, 'fields': {}})
+    partial['count'] += count
+    for field, agg in fields.items():
+        current = partial['fields'].get(field)
+        if current is None:
+            partial['fields'][field] = dict(agg)
+        else:
+            current['sum'] += agg['sum']
+            current['n'] += agg['n']
+            current['min'] = min(current['min'], agg['min'])
+            current['max'] = max(current['max'], agg['max'])
+
+
+def _finish_partial(start_epoch, partial):
+    row = {"start": datetime.fromtimestamp(start_epoch, timezone.utc).isoformat(), "count": partial['count']}
+    for field, agg in partial['fields'].items():
+        row[field] = {"min": agg['min'], "max": agg['max'], "avg": agg['sum'] / agg['n']}
+    return row
@@ -0,0 +1,29 @@
+"""One production backend worker: the app of model.py on gevent's WSGI server.
+
+    PORT=5001 python worker.py
+
+Takes the same environment as model.py (MONGO_URI, RUN_PRODUCER,
+SOCKETIO_MESSAGE_QUEUE, ...). The standard library is monkey-patched before
+model.py is imported, so its background jobs, the write-behind buffer and the
+database and queue clients yield to the server instead of blocking it.
+WebSockets are handled by simple-websocket. serve.py starts several of these.
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import os  # noqa: E402
+
+os.environ['SOCKETIO_ASYNC_MODE'] = 'gevent'
+
+import model  # noqa: E402
+
+
+def main():
+    model.exit_on_sigterm()
+    model.start_background_jobs()
+    model.socketio.run(model.app, host='0.0.0.0', port=int(os.environ.get('PORT', '5000')))
+
+
+if __name__ == '__main__':
+    main()
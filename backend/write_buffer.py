@@ -0,0 +1,121 @@
+import queue
+import threading
+import time
+
+
+class WriteBehindBuffer:
+    """Collects events and writes them in batches on a background thread.
+
+    A batch is flushed once max_batch events are pending or max_delay_s has
+    passed since the first of them arrived. The queue is bounded: when the
+    database falls behind, put() blocks for up to put_timeout_s and then
+    drops the event, so producers slow down instead of piling up memory.
+    close() drains everything still queued before returning.
+
+    flush_fn may return how many events of the batch it rejected; those are
+    counted as failed and the rest as written. A flush that raises is retried
+    up to retries times, waiting retry_backoff_s and then twice as long each
+    time, before the whole batch is counted as failed. close(timeout) gives up
+    on whatever is still queued after timeout seconds.
+    """
+
+    def __init__(self, flush_fn, max_batch=500, max_delay_s=0.5, max_pending=10000, put_timeout_s=0.05,
+                 retries=3, retry_backoff_s=0.1, name='write-behind'):
+        self.flush_fn = flush_fn
+        self.max_batch = max_batch
+        self.max_delay_s = max_delay_s
+        self.put_timeout_s = put_timeout_s
+        self.retries = retries
+        self.retry_backoff_s = retry_backoff_s
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stats_lock = threading.Lock()
+        self._closed = threading.Event()
+        self.accepted = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.retried = 0
+        self.flushes = 0
+        self.flush_seconds_total = 0.0
+        self.flush_seconds_max = 0.0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, event):
+        if self._closed.is_set():
+            raise RuntimeError('WriteBehindBuffer is closed')
+        try:
+            self._queue.put(event, timeout=self.put_timeout_s)
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            return False
+        with self._stats_lock:
+            self.accepted += 1
+        return True
+
+    def close(self, timeout=None):
+        if not self._closed.is_set():
+            self._closed.set()
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                print(f'{self._thread.name}: gave up after {timeout}s with {self._queue.qsize()} events still queued')
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'pending': self._queue.qsize(),
+                'accepted': self.accepted,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'retried': self.retried,
+                'flushes': self.flushes,
+                'avgFlushMs': self.flush_seconds_total / self.flushes * 1000.0 if self.flushes else 0.0,
+                'maxFlushMs': self.flush_seconds_max * 1000.0,
+            }
+
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=self.max_delay_s)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_delay_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 and not self._closed.is_set()
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        for attempt in range(self.retries + 1):
+            t0 = time.perf_counter()
+            try:
+                rejected = self.flush_fn(batch) or 0
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    print(f'Write-behind flush of {len(batch)} events failed after {attempt + 1} attempts: {e}')
+                    with self._stats_lock:
+                        self.failed += len(batch)
+                    return
+                print(f'Write-behind flush of {len(batch)} events failed, retrying: {e}')
+                with self._stats_lock:
+                    self.retried += 1
+                time.sleep(self.retry_backoff_s * 2 ** attempt)
+        elapsed = time.perf_counter() - t0
+        with self._stats_lock:
+            self.written += len(batch) - rejected
+            self.failed += rejected
+            self.flushes += 1
+            self.flush_seconds_total += elapsed
+            self.flush_seconds_max = max(self.flush_seconds_max, elapsed)
+
+    def _run(self):
+        while not (self._closed.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
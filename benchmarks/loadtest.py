@@ -0,0 +1,429 @@
+"""End-to-end load test of the backend and AI services, run entirely locally.
+
+Starts backend/worker.py (against mongomock, or a local mongod with
+--mongo-uri) and the AI service with a small freshly trained model, then
+drives them for --duration seconds:
+
+  wearables    each sends a vitals reading over Socket.IO (vitalsUpdate,
+               acknowledged) and POSTs it to the AI service's /predict,
+               --rate times per second
+  subscribers  Socket.IO clients following --follow patients each;
+               delivery latency is measured from the wearable's send time
+  readers      dashboard REST reads (vitals history, top doctors) at
+               --read-rate requests per second in total
+
+Latencies are measured from each request's scheduled send time, so a
+service that falls behind shows up as latency and not as a lower request
+rate. CPU and memory are sampled for each service's process tree. The JSON
+written with --output records the git commit and the configuration.
+--compare prints the differences from an earlier run.
+
+The AI service is run through ai/serve.py, which serves the same Flask app
+as ai/model.py. The __main__ block of model.py runs Flask's debug server
+with the reloader, and that would add a second process to the measurements.
+
+    python benchmarks/loadtest.py --wearables 20 --rate 2 --subscribers 50 --duration 30 --output base.json
+    python benchmarks/loadtest.py --wearables 20 --rate 2 --subscribers 50 --duration 30 --compare base.json
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+import psutil
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AI_DIR = os.path.join(ROOT_DIR, 'ai')
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url, proc, timeout=300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'{url} exited with status {proc.returncode}')
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise TimeoutError(f'{url} did not become ready')
+
+
+@contextlib.contextmanager
+def small_model(path=None):
+    if path:
+        yield path
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run([sys.executable, 'train.py', '--model-dir', tmp, '--epochs', '1', '--samples', '64'],
+                       cwd=AI_DIR, check=True, capture_output=True, env={**os.environ, 'TF_CPP_MIN_LOG_LEVEL': '3'})
+        yield tmp
+
+
+@contextlib.contextmanager
+def services(args, model_dir):
+    backend_port, ai_port = free_port(), free_port()
+    backend_env = {**os.environ, 'MONGO_URI': args.mongo_uri, 'PORT': str(backend_port), 'DEBUG': '0',
+                   'RUN_PRODUCER': '0', 'CORS_ORIGINS': '*'}
+    ai_env = {**os.environ, 'MODEL_DIR': model_dir, 'INFERENCE_BACKEND': args.ai_backend, 'TF_CPP_MIN_LOG_LEVEL': '3'}
+    procs = {
+        'backend': subprocess.Popen([sys.executable, 'worker.py'], cwd=BACKEND_DIR, env=backend_env,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL),
+        'ai': subprocess.Popen([sys.executable, 'serve.py', '--workers', str(args.ai_workers), '--host', '127.0.0.1',
+                                '--port', str(ai_port)],
+                               cwd=AI_DIR, env=ai_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL),
+    }
+    urls = {'backend': f'http://127.0.0.1:{backend_port}', 'ai': f'http://127.0.0.1:{ai_port}'}
+    try:
+        wait_ready(urls['backend'] + '/api/community/top-doctors', procs['backend'])
+        wait_ready(urls['ai'] + '/readyz', procs['ai'])
+        yield urls, procs
+    finally:
+        for proc in procs.values():
+            proc.send_signal(signal.SIGTERM)
+        for proc in procs.values():
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+class ResourceSampler(threading.Thread):
+    """Samples RSS and CPU of a process and its children every interval_s."""
+
+    def __init__(self, pid, interval_s=0.5):
+        super().__init__(daemon=True)
+        self.process = psutil.Process(pid)
+        self.interval_s = interval_s
+        self.rss = []
+        self.cpu = []
+        self._done = threading.Event()
+        self._cpu_times = {}
+
+    def _tree(self):
+        try:
+            return [self.process] + self.process.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+
+    def _cpu_seconds(self):
+        for proc in self._tree():
+            try:
+                times = proc.cpu_times()
+                self._cpu_times[proc.pid] = times.user + times.system
+            except psutil.NoSuchProcess:
+                pass
+        # Keep the last reading of processes that have exited
+        return sum(self._cpu_times.values())
+
+    def run(self):
+        last_cpu, last_t = self._cpu_seconds(), time.monotonic()
+        self.start_cpu = last_cpu
+        while not self._done.wait(self.interval_s):
+            rss = 0
+            for proc in self._tree():
+                try:
+                    rss += proc.memory_info().rss
+                except psutil.NoSuchProcess:
+                    pass
+            cpu, now = self._cpu_seconds(), time.monotonic()
+            self.rss.append(rss / 2 ** 20)
+            self.cpu.append((cpu - last_cpu) / (now - last_t) * 100.0)
+            last_cpu, last_t = cpu, now
+        self.end_cpu = last_cpu
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return {
+            'rss_mb_avg': float(np.mean(self.rss)) if self.rss else 0.0,
+            'rss_mb_max': float(np.max(self.rss)) if self.rss else 0.0,
+            'cpu_percent_avg': float(np.mean(self.cpu)) if self.cpu else 0.0,
+            'cpu_percent_max': float(np.max(self.cpu)) if self.cpu else 0.0,
+            'cpu_seconds': self.end_cpu - self.start_cpu,
+        }
+
+
+def paced(rate, start_at, end_at, offset=0.0):
+    """Yield scheduled send times at rate per second, sleeping until each."""
+    interval = 1.0 / rate
+    t = start_at + offset * interval
+    while t < end_at:
+        delay = t - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        yield t
+        t += interval
+
+
+def reading(patient_id):
+    return {
+        "patientId": patient_id,
+        "heartRate": 70 + random.randint(0, 30),
+        "spO2": 95 + random.randint(0, 5),
+        "respirationRate": 12 + random.randint(0, 8),
+        "temperature": round(36.2 + random.random(), 1),
+        "timestamp": datetime.now().isoformat(),
+        "prediction": "Normal",
+        "anomalyScore": random.random() * 0.8,
+    }
+
+
+def disconnect_all(clients):
+    # Client.disconnect() can wait seconds for its reader thread, so close them side by side
+    threads = [threading.Thread(target=client.disconnect) for client in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def post_json(url, body, timeout=30):
+    req = urllib.request.Request(url, data=json.dumps(body).encode(), headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        resp.read()
+
+
+def wearable_worker(urls, patient_ids, rate, start_at, end_at, out):
+    import socketio
+
+    samples = {'ingest': [], 'predict': []}
+    errors = {'ingest': 0, 'predict': 0}
+    lock = threading.Lock()
+
+    def record(kind, scheduled, ok):
+        with lock:
+            if ok:
+                samples[kind].append(time.time() - scheduled)
+            else:
+                errors[kind] += 1
+
+    def ingest(client, patient_id, offset):
+        for scheduled in paced(rate, start_at, end_at, offset):
+            try:
+                client.call('vitalsUpdate', {**reading(patient_id), 'benchSentAt': scheduled}, timeout=10)
+                record('ingest', scheduled, True)
+            except Exception:
+                record('ingest', scheduled, False)
+
+    def predict(patient_id, offset):
+        for scheduled in paced(rate, start_at, end_at, offset):
+            try:
+                post_json(urls['ai'] + '/predict', reading(patient_id))
+                record('predict', scheduled, True)
+            except Exception:
+                record('predict', scheduled, False)
+
+    clients, threads = [], []
+    for i, patient_id in enumerate(patient_ids):
+        client = socketio.Client()
+        client.connect(urls['backend'], transports=['websocket'])
+        clients.append(client)
+        offset = random.random()
+        threads += [threading.Thread(target=ingest, args=(client, patient_id, offset)),
+                    threading.Thread(target=predict, args=(patient_id, offset))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    out.put({'samples': samples, 'errors': errors})
+    disconnect_all(clients)
+
+
+def subscriber_worker(urls, subscriptions, start_at, end_at, out):
+    import socketio
+
+    latencies = []
+    lock = threading.Lock()
+
+    def on_vitals(data):
+        sent = data.get('benchSentAt')
+        if sent and start_at <= sent < end_at:
+            with lock:
+                latencies.append(time.time() - sent)
+
+    clients = []
+    connect_errors = 0
+    for patients in subscriptions:
+        client = socketio.Client()
+        client.on('vitalsUpdate', on_vitals)
+        try:
+            client.connect(urls['backend'], transports=['websocket'])
+            client.call('subscribe', {'patients': patients}, timeout=10)
+            clients.append(client)
+        except Exception:
+            connect_errors += 1
+    time.sleep(max(0.0, end_at - time.time()) + 2.0)  # let in-flight deliveries arrive
+    with lock:
+        out.put({'samples': {'delivery': list(latencies)}, 'errors': {'delivery': connect_errors}})
+    disconnect_all(clients)
+
+
+def reader_worker(urls, patient_ids, rate, start_at, end_at, out):
+    paths = [f'/api/patients/{p}/vitals?limit=100' for p in patient_ids] + ['/api/community/top-doctors']
+    samples, errors = [], 0
+    for i, scheduled in enumerate(paced(rate, start_at, end_at, random.random())):
+        try:
+            with urllib.request.urlopen(urls['backend'] + paths[i % len(paths)], timeout=30) as resp:
+                resp.read()
+            samples.append(time.time() - scheduled)
+        except Exception:
+            errors += 1
+    out.put({'samples': {'reads': samples}, 'errors': {'reads': errors}})
+
+
+def summarize(latencies_s, errors, duration):
+    ms = np.asarray(latencies_s) * 1000.0
+    if not ms.size:
+        return {'count': 0, 'errors': errors, 'throughput_rps': 0.0}
+    return {
+        'count': int(ms.size),
+        'errors': errors,
+        'throughput_rps': ms.size / duration,
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max()),
+    }
+
+
+def split(items, parts):
+    return [chunk for chunk in (items[i::parts] for i in range(parts)) if chunk]
+
+
+def run(args, urls, procs):
+    patient_ids = [f'bench{i}' for i in range(args.wearables)]
+    subscriptions = [random.sample(patient_ids, min(args.follow, len(patient_ids))) for _ in range(args.subscribers)]
+    # Leave time for every client to connect before the measured window opens
+    start_at = time.time() + args.warmup
+    end_at = start_at + args.duration
+
+    out = multiprocessing.Queue()
+    workers = []
+    for ids in split(patient_ids, args.client_processes):
+        workers.append(multiprocessing.Process(target=wearable_worker, args=(urls, ids, args.rate, start_at, end_at, out)))
+    for subs in split(subscriptions, args.client_processes):
+        workers.append(multiprocessing.Process(target=subscriber_worker, args=(urls, subs, start_at, end_at, out)))
+    if args.read_rate > 0:
+        workers.append(multiprocessing.Process(target=reader_worker, args=(urls, patient_ids, args.read_rate, start_at, end_at, out)))
+
+    samplers = {name: ResourceSampler(proc.pid) for name, proc in procs.items()}
+    for worker in workers:
+        worker.start()
+    time.sleep(max(0.0, start_at - time.time()))
+    for sampler in samplers.values():
+        sampler.start()
+    collected = [out.get(timeout=args.warmup + args.duration + 300) for _ in workers]
+    resources = {name: sampler.stop() for name, sampler in samplers.items()}
+    for worker in workers:
+        worker.join()
+
+    samples, errors = {}, {}
+    for result in collected:
+        for kind, values in result['samples'].items():
+            samples.setdefault(kind, []).extend(values)
+        for kind, count in result['errors'].items():
+            errors[kind] = errors.get(kind, 0) + count
+    return {
+        **{kind: summarize(samples[kind], errors.get(kind, 0), args.duration) for kind in sorted(samples)},
+        'resources': resources,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    for kind, r in results['results'].items():
+        if kind == 'resources':
+            continue
+        if not r['count']:
+            print(f"{kind:<9} no samples ({r['errors']} errors)")
+            continue
+        print(f"{kind:<9} {r['throughput_rps']:8.1f}/s  p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  "
+              f"p99 {r['p99_ms']:8.2f} ms  errors {r['errors']}")
+    for name, r in results['results']['resources'].items():
+        print(f"{name:<9} RSS avg {r['rss_mb_avg']:7.1f} MiB  max {r['rss_mb_max']:7.1f} MiB  "
+              f"CPU avg {r['cpu_percent_avg']:6.1f}%  {r['cpu_seconds']:.1f} CPU s")
+
+
+def compare(baseline, results):
+    print(f"\nvs {baseline.get('commit') or 'baseline'}:")
+    if baseline.get('config') != results['config']:
+        print('  (configurations differ)')
+    for kind, current in results['results'].items():
+        before = baseline['results'].get(kind, {})
+        keys = ['rss_mb_max', 'cpu_percent_avg'] if kind == 'resources' else ['throughput_rps', 'p50_ms', 'p99_ms']
+        rows = current.items() if kind == 'resources' else [(kind, current)]
+        for name, values in rows:
+            old = before.get(name, {}) if kind == 'resources' else before
+            for key in keys:
+                if key in values and old.get(key):
+                    delta = (values[key] - old[key]) / old[key] * 100.0
+                    print(f"  {name:<9} {key:<16} {old[key]:10.2f} -> {values[key]:10.2f}  ({delta:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-uri', default='mongomock://')
+    parser.add_argument('--model-dir', help='AI model artifacts; a small model is trained if omitted')
+    parser.add_argument('--ai-backend', default='keras', choices=['keras', 'numpy'])
+    parser.add_argument('--ai-workers', type=int, default=1)
+    parser.add_argument('--wearables', type=int, default=20)
+    parser.add_argument('--rate', type=float, default=1.0, help='readings per second per wearable')
+    parser.add_argument('--subscribers', type=int, default=50)
+    parser.add_argument('--follow', type=int, default=3, help='patients each subscriber follows')
+    parser.add_argument('--read-rate', type=float, default=5.0, help='dashboard REST reads per second (0 to disable)')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=5, help='seconds allowed for clients to connect')
+    parser.add_argument('--client-processes', type=int, default=max(1, min(4, os.cpu_count() or 1)))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--compare', help='results JSON of an earlier run')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    config = {k: v for k, v in vars(args).items() if k not in ('model_dir', 'output', 'compare', 'json')}
+    with small_model(args.model_dir) as model_dir, services(args, model_dir) as (urls, procs):
+        results = {'commit': git_commit(), 'config': config, 'results': run(args, urls, procs)}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()